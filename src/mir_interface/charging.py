@@ -0,0 +1,242 @@
+"""
+Opportunistic charging for the MiR base during predicted idle windows.
+"""
+
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from mir_interface.mir_interface import MIRBase
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = {"Pending", "Executing"}
+
+
+class ChargingScheduler:
+    """Sends the robot to its charger when idle and the battery allows it, and gives way to new missions."""
+
+    def __init__(
+        self,
+        base: "MIRBase",
+        charger_location: str,
+        *,
+        charge_below: float = 60.0,
+        critical_level: float = 20.0,
+        safe_level: float = 40.0,
+        charged_level: float = 95.0,
+        min_idle_window: float = 600.0,
+        idle_grace: float = 60.0,
+        poll_interval: float = 10.0,
+        max_charge_wait: float = 1800.0,
+        is_busy: Optional[Callable[[], bool]] = None,
+        clock: Optional[Callable[[], float]] = None,
+    ) -> None:
+        """
+        Initialize the scheduler.
+
+        Args:
+            base (MIRBase): The driver used to read the battery and mission queue and to dock.
+            charger_location (str): Name of the docking location of the charger.
+            charge_below (float): Battery percentage below which idle time is used to charge.
+            critical_level (float): Battery percentage below which the robot charges as soon as it is idle.
+            safe_level (float): Minimum battery percentage at which a new mission may interrupt charging.
+            charged_level (float): Battery percentage at which charging is considered complete.
+            min_idle_window (float): Minimum predicted idle seconds for an opportunistic charge.
+            idle_grace (float): Seconds the robot must be idle before a charge is started.
+            poll_interval (float): Seconds between battery checks while waiting for the safe level.
+            max_charge_wait (float): Maximum seconds to wait for the safe level before a mission.
+            is_busy (callable): Optional check for work not yet visible in the mission queue.
+            clock (callable): Returns the current time in seconds. Defaults to time.time.
+        """
+        if not 0 <= critical_level <= safe_level <= charged_level <= 100:
+            raise ValueError(
+                "Battery levels must satisfy 0 <= critical <= safe <= charged <= 100."
+            )
+        self.base = base
+        self.charger_location = charger_location
+        self.charge_below = charge_below
+        self.critical_level = critical_level
+        self.safe_level = safe_level
+        self.charged_level = charged_level
+        self.min_idle_window = min_idle_window
+        self.idle_grace = idle_grace
+        self.poll_interval = poll_interval
+        self.max_charge_wait = max_charge_wait
+        self.is_busy = is_busy or (lambda: False)
+        self.clock = clock or time.time
+
+        self.charging = False
+        self.charge_queue_id = None
+        self.idle_since = None
+        self.idle_periods = deque(maxlen=50)
+        self._lock = threading.Lock()
+
+    def battery_percentage(self) -> float:
+        """
+        Retrieves the current battery percentage of the MiR base.
+
+        Returns:
+            float: The battery charge in percent.
+        """
+        url = "status/?whitelist=battery_percentage"
+        return float(self.base.receive_response(url).get("battery_percentage"))
+
+    def robot_idle(self, mission_queue: Optional[list] = None) -> bool:
+        """
+        Checks whether the robot has no pending or executing missions other than charging.
+
+        Args:
+            mission_queue (list): The mission queue, if already retrieved.
+
+        Returns:
+            bool: True if the robot is idle.
+        """
+        if self.is_busy():
+            return False
+        if mission_queue is None:
+            mission_queue = self.base.get_mission_queue()
+        return not any(
+            entry.get("state") in ACTIVE_STATES
+            and entry.get("id") != self.charge_queue_id
+            for entry in mission_queue
+        )
+
+    def predicted_idle(self) -> Optional[float]:
+        """
+        Predicts the length of an idle period from the idle periods observed so far.
+
+        Returns:
+            float: The median observed idle period in seconds, or None before three were observed.
+        """
+        if len(self.idle_periods) < 3:
+            return None
+        return statistics.median(self.idle_periods)
+
+    def tick(self) -> None:
+        """
+        Updates the idle tracking and starts or ends charging. Intended to be called periodically.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._tick()
+
+    def _tick(self) -> None:
+        """Runs one scheduling step. Must be called with the lock held."""
+        now = self.clock()
+        mission_queue = self.base.get_mission_queue()
+        if self.charging and self._charge_failed(mission_queue):
+            self._stop_charging()
+        idle = self.robot_idle(mission_queue)
+        if idle and self.idle_since is None:
+            self.idle_since = now
+        elif not idle and self.idle_since is not None:
+            self.idle_periods.append(now - self.idle_since)
+            self.idle_since = None
+
+        if not idle:
+            return
+
+        battery = self.battery_percentage()
+        if self.charging:
+            if battery >= self.charged_level:
+                self._stop_charging()
+            return
+
+        idle_for = now - self.idle_since
+        if battery <= self.critical_level or (
+            battery < self.charge_below
+            and idle_for >= self.idle_grace
+            and self._idle_remaining(idle_for) >= self.min_idle_window
+        ):
+            self._start_charging()
+
+    def start_charging(self) -> None:
+        """
+        Docks the robot at the charger.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._start_charging()
+
+    def _start_charging(self) -> None:
+        """Docks the robot at the charger. Must be called with the lock held."""
+        queue_entry = self.base.dock(self.charger_location, action_type="charging")
+        self.charge_queue_id = queue_entry.get("id")
+        self.charging = True
+
+    def prepare_for_mission(self) -> None:
+        """
+        Ends charging so a new mission can run, once the battery is at least at the safe level.
+
+        Blocks, polling the battery, while the battery is below the safe level and the
+        robot is charging. If the charging mission fails, the wait ends early.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the battery does not reach the safe level within max_charge_wait.
+        """
+        with self._lock:
+            if not self.charging:
+                return
+
+        waited = 0.0
+        while self.battery_percentage() < self.safe_level:
+            with self._lock:
+                if not self.charging:
+                    return
+                if self._charge_failed(self.base.get_mission_queue()):
+                    self._stop_charging()
+                    return
+            if waited >= self.max_charge_wait:
+                raise ValueError(
+                    f"Battery did not reach {self.safe_level}% within "
+                    f"{self.max_charge_wait} seconds of charging."
+                )
+            self.base.transport.sleep(self.poll_interval)
+            waited += self.poll_interval
+
+        with self._lock:
+            if not self.charging:
+                return
+            charge_entry = [
+                entry
+                for entry in self.base.get_mission_queue()
+                if entry.get("id") == self.charge_queue_id
+                and entry.get("state") in ACTIVE_STATES
+            ]
+            if charge_entry:
+                self.base.delete(f"mission_queue/{self.charge_queue_id}")
+            self._stop_charging()
+
+    def _charge_failed(self, mission_queue: list) -> bool:
+        """Whether the charging mission finished without reaching the charger."""
+        for entry in mission_queue:
+            if entry.get("id") == self.charge_queue_id:
+                state = entry.get("state")
+                if state not in ACTIVE_STATES and state != "Done":
+                    logger.warning("Charging mission ended in state %s", state)
+                    return True
+        return False
+
+    def _stop_charging(self) -> None:
+        """Forgets the charging mission. Must be called with the lock held."""
+        self.charging = False
+        self.charge_queue_id = None
+
+    def _idle_remaining(self, idle_for: float) -> float:
+        """Expected seconds of idle time left, assuming a long window before any history exists."""
+        predicted = self.predicted_idle()
+        if predicted is None:
+            return self.min_idle_window
+        return predicted - idle_for
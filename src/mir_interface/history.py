@@ -0,0 +1,286 @@
+"""
+Local SQLite store of the missions submitted to the MiR base, with throughput queries.
+"""
+
+import itertools
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS missions (
+    queue_id INTEGER PRIMARY KEY,
+    mission_name TEXT,
+    action_type TEXT,
+    from_location TEXT,
+    location TEXT,
+    submitted REAL,
+    started REAL,
+    finished REAL,
+    state TEXT
+);
+CREATE INDEX IF NOT EXISTS missions_finished ON missions (finished);
+CREATE INDEX IF NOT EXISTS missions_leg ON missions (from_location, location);
+CREATE INDEX IF NOT EXISTS missions_action_type ON missions (action_type, state);
+"""
+
+STATEMENTS = {
+    "submitted": """
+        INSERT INTO missions
+            (queue_id, mission_name, action_type, from_location, location, submitted, state)
+        VALUES (?, ?, ?, ?, ?, ?, 'Pending')
+        ON CONFLICT (queue_id) DO UPDATE SET
+            mission_name = excluded.mission_name,
+            action_type = excluded.action_type,
+            from_location = excluded.from_location,
+            location = excluded.location,
+            submitted = excluded.submitted
+    """,
+    "started": """
+        UPDATE missions SET started = ?, state = 'Executing'
+        WHERE queue_id = ? AND started IS NULL
+    """,
+    "finished": "UPDATE missions SET finished = ?, state = ? WHERE queue_id = ?",
+}
+
+_STOP = object()
+
+
+class MissionHistory:
+    """Records mission queue entries to SQLite from a background writer thread."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+    ) -> None:
+        """
+        Open (or create) the history database and start the writer thread.
+
+        Args:
+            path (str | Path): The SQLite database file.
+            batch_size (int): Maximum number of records written per transaction.
+            flush_interval (float): Seconds to wait for more records before writing a partial batch.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+
+        with closing(self._connect()) as connection:
+            connection.executescript(SCHEMA)
+
+        self._writer = threading.Thread(
+            target=self._write_loop, name="mir_mission_history", daemon=True
+        )
+        self._writer.start()
+
+    def record_submitted(
+        self,
+        queue_id: int,
+        mission_name: str,
+        action_type: str,
+        *,
+        location: Optional[str] = None,
+        from_location: Optional[str] = None,
+        submitted: Optional[float] = None,
+    ) -> None:
+        """
+        Record a mission posted to the queue.
+
+        Args:
+            queue_id (int): The ID of the mission queue entry.
+            mission_name (str): The name of the mission.
+            action_type (str): The kind of mission, e.g. 'move', 'docking' or 'wait'.
+            location (str): The target location, if any.
+            from_location (str): The location the robot was sent to before this mission.
+            submitted (float): Submission time as a UNIX timestamp. Defaults to now.
+        """
+        submitted = time.time() if submitted is None else submitted
+        self._queue.put(
+            (
+                "submitted",
+                (
+                    queue_id,
+                    mission_name,
+                    action_type,
+                    from_location,
+                    location,
+                    submitted,
+                ),
+            )
+        )
+
+    def record_started(self, queue_id: int, started: Optional[float] = None) -> None:
+        """Record that a queued mission started executing."""
+        started = time.time() if started is None else started
+        self._queue.put(("started", (started, queue_id)))
+
+    def record_finished(
+        self, queue_id: int, state: str, finished: Optional[float] = None
+    ) -> None:
+        """Record the final state of a queued mission."""
+        finished = time.time() if finished is None else finished
+        self._queue.put(("finished", (finished, state, queue_id)))
+
+    def flush(self) -> None:
+        """Block until every record queued so far has been written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write any remaining records and stop the writer thread."""
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def missions_per_hour(
+        self, since: Optional[float] = None, until: Optional[float] = None
+    ) -> float:
+        """
+        Rate of successfully completed missions.
+
+        Args:
+            since (float): Start of the window as a UNIX timestamp. Defaults to the first submitted mission.
+            until (float): End of the window as a UNIX timestamp. Defaults to now.
+
+        Returns:
+            float: Completed missions per hour over the window.
+        """
+        until = time.time() if until is None else until
+        ((first,),) = self._query("SELECT MIN(submitted) FROM missions", ())
+        ((count,),) = self._query(
+            "SELECT COUNT(*) FROM missions "
+            "WHERE state = 'Done' AND finished >= ? AND finished <= ?",
+            (since or 0.0, until),
+        )
+        start = since if since is not None else first
+        if not count or start is None or until <= start:
+            return 0.0
+        return count / ((until - start) / 3600)
+
+    def leg_durations(self, since: Optional[float] = None) -> list:
+        """
+        Duration statistics of completed missions per (from_location, location) pair.
+
+        A leg runs from when the mission started on the robot (or was submitted,
+        if no start was recorded) until it finished.
+
+        Args:
+            since (float): Only include missions finished after this UNIX timestamp.
+
+        Returns:
+            list: One dict per leg with from_location, location, count, p50 and p95 in seconds.
+        """
+        rows = self._query(
+            "SELECT from_location, location, "
+            "finished - COALESCE(started, submitted) AS duration FROM missions "
+            "WHERE state = 'Done' AND location IS NOT NULL AND finished >= ? "
+            "ORDER BY from_location, location, duration",
+            (since or 0.0,),
+        )
+
+        legs = []
+        for (from_location, location), group in itertools.groupby(
+            rows, key=lambda row: (row[0], row[1])
+        ):
+            durations = [row[2] for row in group]
+            legs.append(
+                {
+                    "from_location": from_location,
+                    "location": location,
+                    "count": len(durations),
+                    "p50": _percentile(durations, 0.50),
+                    "p95": _percentile(durations, 0.95),
+                }
+            )
+        return legs
+
+    def failure_rates(self, since: Optional[float] = None) -> dict:
+        """
+        Fraction of finished missions that did not end in the 'Done' state, per action type.
+
+        Args:
+            since (float): Only include missions finished after this UNIX timestamp.
+
+        Returns:
+            dict: Maps action type to a dict with total, failed and rate.
+        """
+        rows = self._query(
+            "SELECT action_type, COUNT(*), SUM(state != 'Done') FROM missions "
+            "WHERE finished IS NOT NULL AND finished >= ? GROUP BY action_type",
+            (since or 0.0,),
+        )
+        return {
+            action_type: {"total": total, "failed": failed, "rate": failed / total}
+            for action_type, total, failed in rows
+        }
+
+    def statistics(self, since: Optional[float] = None) -> dict:
+        """
+        Combined throughput report.
+
+        Args:
+            since (float): Only include missions finished after this UNIX timestamp.
+
+        Returns:
+            dict: missions_per_hour, leg_durations and failure_rates.
+        """
+        return {
+            "missions_per_hour": self.missions_per_hour(since),
+            "leg_durations": self.leg_durations(since),
+            "failure_rates": self.failure_rates(since),
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection to the history database."""
+        return sqlite3.connect(self.path)
+
+    def _query(self, sql: str, parameters: tuple) -> list:
+        """Run a read query on a short-lived connection and return all rows."""
+        with closing(self._connect()) as connection:
+            return connection.execute(sql, parameters).fetchall()
+
+    def _write_loop(self) -> None:
+        """Drain the record queue into the database in batches."""
+        connection = self._connect()
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=self.flush_interval))
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+            records = [record for record in batch if record is not _STOP]
+            try:
+                with connection:
+                    for kind, group in itertools.groupby(
+                        records, key=lambda record: record[0]
+                    ):
+                        connection.executemany(
+                            STATEMENTS[kind], [record[1] for record in group]
+                        )
+            except sqlite3.Error:
+                logger.exception("Failed to write %d mission records", len(records))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        connection.close()
+
+
+def _percentile(values: list, fraction: float) -> float:
+    """Linearly interpolated percentile of a sorted, non-empty list."""
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
@@ -5,24 +5,73 @@ Driver code for the MiR 250 Robotic base.
 
 import datetime as dt
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
+from zoneinfo import ZoneInfo
 
-import requests
+from mir_interface.history import MissionHistory
+from mir_interface.occupancy import OccupancyCache, OccupancyGrid
+from mir_interface.positions import PositionTracker
+from mir_interface.transport import HTTPTransport
+
+FINISHED_STATES = {"Done", "Aborted"}
+QUEUE_ENTRY_FIELDS = "id,state,started,finished"
+TRACKING_TIMEOUT = 24 * 3600
+MAP_SEPARATOR = ":"
 
 
 class MIRBase:
     """Main Driver Class for the MiR Robotic base."""
 
     def __init__(
-        self, mir_ip: str, mir_key: str, map_name: Optional[str] = None
+        self,
+        mir_ip: str,
+        mir_key: str,
+        map_name: Optional[str] = None,
+        *,
+        transport: Optional[HTTPTransport] = None,
+        history: Optional[MissionHistory] = None,
+        occupancy: Optional[OccupancyCache] = None,
+        poll_interval: float = 5.0,
+        entry_positions: Optional[dict] = None,
+        robot_timezone: Optional[str] = None,
     ) -> None:
         """
         Initialize the MiRBase class with default or provided values.
+
+        The transport can be swapped for a RecordingTransport to capture a session
+        to a cassette, or a ReplayTransport to run the driver against one offline.
+        If a MissionHistory is given, every mission posted to the queue is recorded to it,
+        and track_mission_progress should be called periodically to record when they run.
+        If an OccupancyCache is given, move rejects unreachable targets before queueing them.
+        poll_interval is the wait in seconds between mission queue polls. The wait
+        goes through the transport, so a fast replay does not wait in real time.
+        entry_positions maps a map name to the position on that map at which the robot
+        is localized when a mission switches to it.
+        robot_timezone is the IANA time zone (e.g. 'America/Chicago') of the robot's
+        clock, which reports mission times without a zone. Defaults to the host's zone.
+
+        The instance may be shared between threads. Cached state is only replaced
+        under a lock, never mutated in place, so readers can use it without locking.
+        Missions are submitted one at a time.
         """
         self.mir_ip = mir_ip
         self.mir_key = mir_key
         self.host = f"http://{self.mir_ip}/api/v2.0.0/"
+        self.transport = transport or HTTPTransport()
+        self.poll_interval = poll_interval
+        self.history = history
+        self.occupancy = occupancy
+        self.entry_positions = dict(entry_positions or {})
+        self.last_location = None
+        self.last_target = None
+        self.tracked_missions = {}
+        self.tracking_timeout = TRACKING_TIMEOUT
+        self.robot_timezone = ZoneInfo(robot_timezone) if robot_timezone else None
+        self._state_lock = threading.RLock()
+        self._mission_lock = threading.RLock()
 
         # Set up the request headers
         self.headers = {
@@ -30,37 +79,134 @@ class MIRBase:
             "Authorization": self.mir_key,
         }
 
+        self.maps = {}
+        self.locations_dict = {}
+        self.position_trackers = {}
+
         self.map_name = map_name
         self.current_map = self.get_map()
+        self.map_name = self.current_map["name"]
         self.map_guid = self.current_map["guid"]
         self.group_id = self.get_user_group_id()
-        self.create_action_dict()
-        self.create_position_dict()
+        self.action_dict = self.create_action_dict()
         self.curr_mission_queue_id = self.set_mission_queue_id()
+        self.create_position_dict()
         self.status = self.get_state()
 
-    def get_map(self) -> dict:
+    def get_map(self, map_name: Optional[str] = None) -> dict:
         """
-        Retrieve the current map for the MiR base.
+        Retrieve a map of the MiR base, refreshing the cached list of maps.
 
-        If the map name is not set, the first map from the list will be used.
-        Otherwise, it tries to match the map name with the available maps.
-        If no match is found, it defaults to the first map.
+        If no map name is given, the current map name is used. If that is not set
+        either, the first map from the list will be used.
+
+        Args:
+            map_name (str): The name of the map to retrieve.
 
         Returns:
-            dict: The map data of the current map.
+            dict: The map data of the requested map.
+
+        Raises:
+            ValueError: If the robot has no maps or no map with the given name.
         """
         maps = self.receive_response("maps")
         if len(maps) == 0:
             raise ValueError("No maps found for the MiR base.")
-        if not self.map_name:
-            current_map = maps[0]
-        else:
-            current_map = list(filter(lambda map: map["name"] == self.map_name, maps))
-            if not current_map:
-                current_map = maps[0]
+        maps_by_name = {map_data["name"]: map_data for map_data in maps}
+        with self._state_lock:
+            self.maps = maps_by_name
+
+        map_name = map_name or self.map_name
+        if not map_name:
+            return maps[0]
+        if map_name not in maps_by_name:
+            raise ValueError(
+                f"Map '{map_name}' not found. Available maps: {sorted(maps_by_name)}"
+            )
+        return maps_by_name[map_name]
+
+    def switch_map(self, map_name: str) -> Optional[dict]:
+        """
+        Queue a mission that makes the given map the active map of the MiR base.
+
+        The switch runs after the missions already in the queue, and localizes the
+        robot at the entry position of the map. Locations without a map name refer
+        to the new map from now on.
+
+        Args:
+            map_name (str): The name of the map to switch to.
+
+        Returns:
+            dict: The response from posting the mission to the queue, or None if the map is already current.
+        """
+        with self._mission_lock:
+            actions = self.map_switch_actions(map_name)
+            if not actions:
+                return None
+            mission_name = f"switch_to_{map_name}_{dt.datetime.now()}"
+            queue_entry = self.post_mission_to_queue(
+                mission_name,
+                actions,
+                action_type="switch_map",
+                target=(map_name, self.entry_position(map_name)),
+            )
+            self.set_current_map(map_name)
+            return queue_entry
+
+    def map_switch_actions(self, map_name: str) -> list:
+        """
+        Mission actions that switch the robot to a map, to be run before actions on that map.
 
-        return current_map[0]
+        Positions of the map are loaded if they are not cached yet.
+
+        Args:
+            map_name (str): The name of the map the following actions run on.
+
+        Returns:
+            list: A single switch_map action, or no actions if the map is already current.
+
+        Raises:
+            ValueError: If no entry position is configured for the map.
+        """
+        if map_name == self.map_name:
+            return []
+        new_map = self.maps.get(map_name) or self.get_map(map_name)
+        entry = self.entry_position(map_name)
+        return [{"switch_map": {"map": new_map["guid"], "position": entry["guid"]}}]
+
+    def entry_position(self, map_name: str) -> dict:
+        """
+        The position at which the robot is localized when a mission switches to a map.
+
+        Args:
+            map_name (str): The name of the map.
+
+        Returns:
+            dict: The details of the entry position.
+
+        Raises:
+            ValueError: If no entry position is configured for the map.
+        """
+        entry_name = self.entry_positions.get(map_name)
+        if entry_name is None:
+            raise ValueError(f"No entry position configured for map '{map_name}'.")
+        return self.resolve_location(f"{map_name}{MAP_SEPARATOR}{entry_name}")[1]
+
+    def set_current_map(self, map_name: str) -> None:
+        """
+        Makes the given map the map that locations without a map name refer to.
+
+        Args:
+            map_name (str): The name of the map.
+
+        Returns:
+            None
+        """
+        new_map = self.maps.get(map_name) or self.get_map(map_name)
+        with self._state_lock:
+            self.map_name = map_name
+            self.current_map = new_map
+            self.map_guid = new_map["guid"]
 
     def get_actions(self) -> list:
         """
@@ -129,7 +275,7 @@ class MIRBase:
             dict: The response from the MiR base after aborting the missions.
         """
 
-        return self.delete("mission_queue", False, "All missions aborted.")
+        return self.delete("mission_queue")
 
     def clear_mission_queue(self) -> str:
         """
@@ -138,8 +284,10 @@ class MIRBase:
         Returns:
             str: The new mission queue ID.
         """
-        self.curr_mission_queue_id = self.set_mission_queue_id()
-        return self.curr_mission_queue_id
+        mission_queue_id = self.set_mission_queue_id()
+        with self._state_lock:
+            self.curr_mission_queue_id = mission_queue_id
+        return mission_queue_id
 
     def find_mission_in_queue(self, mission_name: str) -> None:
         """
@@ -329,6 +477,10 @@ class MIRBase:
         act_param_dict: list,
         description: str = "",
         priority: int = 0,
+        *,
+        action_type: str = "mission",
+        location: Optional[str] = None,
+        target: Optional[tuple] = None,
     ) -> dict:
         """
         Post a mission to the queue. Creates a new mission if it doesn't exist, otherwise updates the existing mission.
@@ -339,38 +491,173 @@ class MIRBase:
             act_param_dict (list of dict): List of dictionaries where each dictionary contains action types and their updated parameters.
             description (str): Description of the mission. Defaults to an empty string.
             priority (int): Priority level when posting the mission to the queue. Defaults to 1.
+            action_type (str): The kind of mission recorded in the mission history.
+            location (str): The location the mission sends the robot to, if any.
+            target (tuple): The map name and position details of where the robot is
+                when the mission ends, if known. Used to check reachability of the
+                following missions.
 
         Returns:
             dict: Response from the MiR base after posting the mission to the queue.
         """
-        search = {
-            "filters": [{"fieldname": "name", "operator": "=", "value": mission_name}]
-        }
-        mission = self.receive_response("missions", search=search)
+        with self._mission_lock:
+            search = {
+                "filters": [
+                    {"fieldname": "name", "operator": "=", "value": mission_name}
+                ]
+            }
+            mission = self.receive_response("missions", search=search)
 
-        if not mission:
-            mission = self.init_mission(mission_name, description)
-            mission_id = mission.get("guid")
-            self.init_action(act_param_dict, mission_id, priority)
-        else:
-            mission_id = mission[0].get("guid")
+            if not mission:
+                mission = self.init_mission(mission_name, description)
+                mission_id = mission.get("guid")
+                self.init_action(act_param_dict, mission_id, priority)
+            else:
+                mission_id = mission[0].get("guid")
 
-        self.set_action_params(mission_id, act_param_dict)
+            self.set_action_params(mission_id, act_param_dict)
 
-        mission_queue_payload = {"mission_id": mission_id, "priority": priority}
-        return self.send_command("mission_queue", mission_queue_payload)
+            mission_queue_payload = {"mission_id": mission_id, "priority": priority}
+            queue_entry = self.send_command("mission_queue", mission_queue_payload)
+            with self._state_lock:
+                self.last_target = target
+            self.track_mission(queue_entry, mission_name, action_type, location)
+            return queue_entry
 
-    def wait_until_finished(self) -> None:
+    def wait_until_finished(self) -> str:
         """
         Continuously checks previously index mission to be done executing. Breaks out of loop once state is achieved.
         Prevents further missions or actions being sent if desired, since "Executing" != BUSY.
+        A mission that was aborted also ends the wait.
+
+        Returns:
+            str: The final state of the last mission, 'Done' or 'Aborted'.
+        """
+        self.set_status("BUSY")
+        mission_queue = self.get_mission_queue()
+        while mission_queue[-1]["state"] not in FINISHED_STATES:
+            self.transport.sleep(self.poll_interval)
+            mission_queue = self.get_mission_queue()
+        self.set_status("IDLE")
+        return mission_queue[-1]["state"]
+
+    def set_status(self, status: str) -> None:
+        """
+        Sets the driver-side status of the MiR base.
+
+        Args:
+            status (str): The new status, e.g. 'BUSY' or 'IDLE'.
+
+        Returns:
+            None
+        """
+        with self._state_lock:
+            self.status = status
+
+    def track_mission(
+        self,
+        queue_entry: dict,
+        mission_name: str,
+        action_type: str,
+        location: Optional[str] = None,
+    ) -> None:
+        """
+        Records a mission posted to the queue in the mission history, if one is configured.
+
+        Args:
+            queue_entry (dict): The mission queue entry returned when posting the mission.
+            mission_name (str): The name of the mission.
+            action_type (str): The kind of mission, e.g. 'move', 'docking' or 'wait'.
+            location (str): The location the mission sends the robot to, if any.
+
+        Returns:
+            None
+        """
+        if self.history is None:
+            return
+        queue_id = queue_entry.get("id")
+        submitted = time.time()
+        with self._state_lock:
+            self.history.record_submitted(
+                queue_id,
+                mission_name,
+                action_type,
+                location=location,
+                from_location=self.last_location,
+                submitted=submitted,
+            )
+            self.tracked_missions = {
+                **self.tracked_missions,
+                queue_id: {"submitted": submitted, "started": False},
+            }
+            if location is not None:
+                self.last_location = location
+
+    def track_mission_progress(self) -> None:
+        """
+        Records start and finish of tracked missions from their mission queue entries.
+
+        The times are taken from the entries' own 'started' and 'finished' fields, so
+        they are accurate however often this is called. Intended to be called
+        periodically, independently of wait_until_finished. Missions that are no
+        longer in the queue, or were submitted more than tracking_timeout seconds
+        ago, are no longer tracked.
+
+        Returns:
+            None
+        """
+        tracked = self.tracked_missions
+        if self.history is None or not tracked:
+            return
+        search = {
+            "filters": [{"fieldname": "id", "operator": ">", "value": min(tracked) - 1}]
+        }
+        mission_queue = self.receive_response(
+            "mission_queue", search=search, whitelist=QUEUE_ENTRY_FIELDS
+        )
+
+        entries = {entry.get("id"): entry for entry in mission_queue}
+        started, finished = [], []
+        expire_before = time.time() - self.tracking_timeout
+        for queue_id, mission in tracked.items():
+            entry = entries.get(queue_id)
+            if entry is None or mission["submitted"] < expire_before:
+                finished.append(queue_id)
+                continue
+            if entry.get("started") and not mission["started"]:
+                started.append(queue_id)
+                self.history.record_started(queue_id, self.robot_time(entry["started"]))
+            if entry.get("state") in FINISHED_STATES:
+                finished.append(queue_id)
+                self.history.record_finished(
+                    queue_id, entry["state"], self.robot_time(entry.get("finished"))
+                )
+
+        with self._state_lock:
+            tracked = dict(self.tracked_missions)
+            for queue_id in started:
+                if queue_id in tracked:
+                    tracked[queue_id] = {**tracked[queue_id], "started": True}
+            for queue_id in finished:
+                tracked.pop(queue_id, None)
+            self.tracked_missions = tracked
+
+    def robot_time(self, value: Optional[str]) -> Optional[float]:
+        """
+        Converts a time reported by the MiR base to a UNIX timestamp.
+
+        Args:
+            value (str): An ISO 8601 time. Times without a zone are in robot_timezone.
+
+        Returns:
+            float: The UNIX timestamp, or None if the time is not set.
         """
-        self.status = "BUSY"
-        mission_finished = self.get_mission_queue()[-1]["state"]
-        while mission_finished != "Done":
-            mission_finished = self.get_mission_queue()[-1]["state"]
-            time.sleep(5)
-        self.status = "IDLE"
+        if not value:
+            return None
+        moment = dt.datetime.fromisoformat(value)
+        if moment.tzinfo is None and self.robot_timezone is not None:
+            moment = moment.replace(tzinfo=self.robot_timezone)
+        return moment.timestamp()
 
     def check_queue_completion(self) -> None:
         """
@@ -417,7 +704,12 @@ class MIRBase:
         get_id = self.receive_response("mission_groups")
         return get_id[0].get("guid")
 
-    def receive_response(self, endpoint: str, search: Optional[dict] = None) -> dict:
+    def receive_response(
+        self,
+        endpoint: str,
+        search: Optional[dict] = None,
+        whitelist: Optional[str] = None,
+    ) -> dict:
         """
         Sends a GET or POST request to the MiR API and handles the response. POST requests are modified GET requests with search payloads to filter the response.
 
@@ -425,6 +717,7 @@ class MIRBase:
             endpoint (str): The API endpoint to query.
             message (str): An optional message to print if the request is successful.
             search (dict): An optional search payload for POST requests.
+            whitelist (str): Optional comma-separated fields to limit the response to.
 
         Returns:
             dict: The parsed JSON response from the API.
@@ -432,14 +725,19 @@ class MIRBase:
         Raises:
             ValueError: If the API request fails.
         """
+        query = f"?whitelist={whitelist}" if whitelist else ""
         if search is not None:
-            url = f"{endpoint}/search"
-            response = requests.post(
-                f"{self.host}{url}", json=search, headers=self.headers, timeout=5
+            url = f"{endpoint}/search{query}"
+            response = self.transport.request(
+                "POST",
+                f"{self.host}{url}",
+                json=search,
+                headers=self.headers,
+                timeout=5,
             )
         else:
-            response = requests.get(
-                f"{self.host}{endpoint}", headers=self.headers, timeout=5
+            response = self.transport.request(
+                "GET", f"{self.host}{endpoint}{query}", headers=self.headers, timeout=5
             )
 
         text = json.loads(response.text)
@@ -463,8 +761,12 @@ class MIRBase:
         Raises:
             ValueError: If the API request fails.
         """
-        response = requests.post(
-            f"{self.host}{endpoint}", json=body, headers=self.headers, timeout=5
+        response = self.transport.request(
+            "POST",
+            f"{self.host}{endpoint}",
+            json=body,
+            headers=self.headers,
+            timeout=5,
         )
         text = json.loads(response.text)
         status = response.status_code
@@ -487,8 +789,12 @@ class MIRBase:
         Raises:
             ValueError: If the API request fails.
         """
-        response = requests.put(
-            f"{self.host}{endpoint}", json=body, headers=self.headers, timeout=5
+        response = self.transport.request(
+            "PUT",
+            f"{self.host}{endpoint}",
+            json=body,
+            headers=self.headers,
+            timeout=5,
         )
         text = json.loads(response.text)
         status = response.status_code
@@ -511,8 +817,8 @@ class MIRBase:
         Raises:
             ValueError: If the API request fails.
         """
-        response = requests.delete(
-            f"{self.host}{endpoint}", headers=self.headers, timeout=5
+        response = self.transport.request(
+            "DELETE", f"{self.host}{endpoint}", headers=self.headers, timeout=5
         )
         text = response.text
         status = response.status_code
@@ -603,40 +909,180 @@ class MIRBase:
                     {"id": "time", "input_name": None, "value": "00:00:05.000000"}
                 ]
             },
+            "switch_map": {
+                "parameters": [
+                    {"id": "map", "input_name": None, "value": None},
+                    {"id": "position", "input_name": None, "value": None},
+                ]
+            },
         }
 
     def create_position_dict(self) -> None:
         """
-        Creates a dictionary of positions from a map and saves it to a JSON file.
+        Creates a dictionary of positions from the current map.
 
         The dictionary maps position names to their details, excluding those with 'entry' in their names.
 
         Returns:
             None
         """
-        url = f"maps/{self.map_guid}/positions"
-        map_positions = self.receive_response(url)
-        position_dict = {}
+        self.refresh_positions()
+
+    def refresh_positions(self, map_name: Optional[str] = None) -> dict:
+        """
+        Updates the position dictionary of a map with positions added, changed or removed on the robot.
+
+        The positions of the map are requested in one search and diffed against the
+        cache, so positions created or moved in the MiR web interface become usable
+        without a restart. If no map is given, the active map of the robot is checked
+        first, so a map switched in the MiR web interface becomes the current map.
+
+        Args:
+            map_name (str): The map to refresh. Defaults to the current map.
+
+        Returns:
+            dict: The names of added, changed and removed positions, whether the map
+                changed and whether the robot switched to another active map.
+        """
+        active_map_switched = False
+        if map_name is None:
+            active_map_switched = self.sync_active_map()
+        result = self.get_position_tracker(map_name or self.map_name).refresh()
+        result["active_map_switched"] = active_map_switched
+        return result
+
+    def sync_active_map(self) -> bool:
+        """
+        Makes the map the robot is localized on the current map, if it was switched outside of this driver.
+
+        The check is skipped while missions are queued, since those may switch maps
+        themselves, and no mission is submitted while it runs.
+
+        Returns:
+            bool: True if the current map changed.
+        """
+        with self._mission_lock:
+            if self.queue_active():
+                return False
+            map_guid = self.receive_response("status", whitelist="map_id").get("map_id")
+            if not map_guid or map_guid == self.map_guid:
+                return False
+
+            maps = {map_data["guid"]: map_data for map_data in self.maps.values()}
+            if map_guid not in maps:
+                self.get_map()
+                maps = {map_data["guid"]: map_data for map_data in self.maps.values()}
+            if map_guid not in maps:
+                return False
+            self.set_current_map(maps[map_guid]["name"])
+            return True
+
+    def queue_active(self) -> bool:
+        """
+        Checks whether missions sent since the last mission queue ID are pending or executing.
+
+        Returns:
+            bool: True if a mission is pending or executing.
+        """
+        return any(
+            entry.get("state") not in FINISHED_STATES
+            for entry in self.get_mission_queue()
+        )
+
+    def refresh_all_positions(self) -> dict:
+        """
+        Updates the position dictionaries of the current map and of every other loaded map.
+
+        Returns:
+            dict: The refresh result of each map, by map name.
+        """
+        result = self.refresh_positions()
+        results = {self.map_name: result}
+        for map_name, tracker in list(self.position_trackers.items()):
+            if map_name not in results:
+                results[map_name] = tracker.refresh()
+        return results
+
+    def load_maps(self, map_names: Optional[list] = None, max_workers: int = 4) -> dict:
+        """
+        Loads the positions of several maps in parallel.
+
+        Args:
+            map_names (list of str): The maps to load. Defaults to every map on the robot.
+            max_workers (int): The number of maps loaded at the same time.
+
+        Returns:
+            dict: The refresh result of each loaded map, by map name.
+        """
+        self.get_map()
+        maps = self.maps
+        if map_names is not None:
+            maps = {name: self.maps[name] for name in map_names}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = {
+                name: executor.submit(self.get_position_tracker(name).refresh, map_data)
+                for name, map_data in maps.items()
+            }
+        return {name: result.result() for name, result in results.items()}
 
-        for position in map_positions:
-            pos_id = position.get("guid")
-            type_id = position.get("type_id")
+    def get_position_tracker(self, map_name: str) -> PositionTracker:
+        """
+        Returns the position tracker of a map, creating it if needed.
 
-            url = f"positions/{pos_id}?whitelist=pos_x,type_id,orientation,guid,pos_y"
-            filtered = self.receive_response(url)
+        Args:
+            map_name (str): The name of the map.
 
-            url = f"positions/{pos_id}?whitelist=name"
-            name = self.receive_response(url).get("name")
+        Returns:
+            PositionTracker: The tracker that keeps the positions of the map up to date.
+        """
+        with self._state_lock:
+            if map_name not in self.position_trackers:
+                self.position_trackers[map_name] = PositionTracker(self, map_name)
+            return self.position_trackers[map_name]
 
-            url = f"position_types/{type_id}"
-            position_type = self.receive_response(url)
-            pos_name = position_type.get("name")
+    def publish_positions(self, map_data: dict, positions: dict) -> None:
+        """
+        Replaces the position dictionary of a map.
 
-            if "entry" not in pos_name:
-                position_dict[name] = filtered
+        A new locations_dict is built and swapped in, so readers always see a complete index.
 
-        data = {self.map_name: position_dict}
-        self.locations_dict = data
+        Args:
+            map_data (dict): The map the positions belong to.
+            positions (dict): The positions of the map by name.
+
+        Returns:
+            None
+        """
+        map_name = map_data["name"]
+        with self._state_lock:
+            self.maps = {**self.maps, map_name: map_data}
+            self.locations_dict = {**self.locations_dict, map_name: positions}
+            if map_name == self.map_name:
+                self.current_map = map_data
+                self.map_guid = map_data["guid"]
+
+    def resolve_location(self, location_name: str) -> tuple:
+        """
+        Finds the map and position of a location name.
+
+        Location names may be qualified with a map name, as in 'map_name:location_name'.
+        Unqualified names refer to the current map. Positions of a map are loaded on first use.
+
+        Args:
+            location_name (str): The, optionally map-qualified, location name.
+
+        Returns:
+            tuple: The map name and the position details.
+        """
+        map_name, location = self.map_name, location_name
+        prefix, separator, rest = location_name.partition(MAP_SEPARATOR)
+        if separator and (prefix in self.maps or prefix in self.locations_dict):
+            map_name, location = prefix, rest
+
+        if map_name not in self.locations_dict:
+            self.refresh_positions(map_name)
+        return map_name, self.locations_dict[map_name][location]
 
     def set_mission_queue_id(self) -> int:
         """
@@ -660,10 +1106,103 @@ class MIRBase:
 
         return state.upper()
 
+    def get_position(self) -> tuple:
+        """
+        Retrieves the current position of the MiR base on the active map.
+
+        Returns:
+            tuple: The x and y coordinates in meters.
+        """
+        url = "status/?whitelist=position"
+        position = self.receive_response(url).get("position")
+        return position["x"], position["y"]
+
+    def get_occupancy_grid(self, map_name: Optional[str] = None) -> OccupancyGrid:
+        """
+        Retrieves the occupancy grid of a map, decoding and caching it on first use.
+
+        Args:
+            map_name (str): The map to get the grid for. Defaults to the current map.
+
+        Returns:
+            OccupancyGrid: The occupancy grid of the map.
+        """
+        if self.occupancy is None:
+            raise ValueError("No occupancy cache is configured for the MiR base.")
+        map_name = map_name or self.map_name
+        map_data = self.maps.get(map_name) or self.get_map(map_name)
+        return self.occupancy.get(self, map_data["guid"])
+
+    def check_reachable(
+        self, location_name: str, clearance: float = 0.0
+    ) -> Optional[float]:
+        """
+        Checks on the local occupancy grid that a location is in free space and reachable.
+
+        The path is planned from where a mission queued now would start, see
+        planning_start. It is not planned if that start is unknown or on another map,
+        since paths between maps cannot be planned.
+
+        Args:
+            location_name (str): The, optionally map-qualified, location name.
+            clearance (float): Required distance in meters to obstacles.
+
+        Returns:
+            float: The approximate path length in meters, or None if no path was planned.
+
+        Raises:
+            ValueError: If the location is in an obstacle or cannot be reached.
+        """
+        map_name, position = self.resolve_location(location_name)
+        grid = self.get_occupancy_grid(map_name)
+        target = (position["pos_x"], position["pos_y"])
+        if not grid.is_free(*target, clearance=clearance):
+            raise ValueError(f"Location '{location_name}' is not in free space.")
+        start = self.planning_start(map_name)
+        if start is None:
+            return None
+
+        length = grid.path_length(start, target, clearance=clearance)
+        if length is None:
+            raise ValueError(
+                f"Location '{location_name}' is not reachable from the current position."
+            )
+        return length
+
+    def planning_start(self, map_name: str) -> Optional[tuple]:
+        """
+        Finds where the robot will be when a mission queued now starts.
+
+        While missions are queued, that is the target of the last queued mission.
+        Otherwise it is the robot's position, if the robot is localized on the map.
+
+        Args:
+            map_name (str): The map the next mission runs on.
+
+        Returns:
+            tuple: The x and y coordinates in meters, or None if unknown or on another map.
+        """
+        if self.queue_active():
+            last_target = self.last_target
+            if last_target is None or last_target[0] != map_name:
+                return None
+            return last_target[1]["pos_x"], last_target[1]["pos_y"]
+
+        status = self.receive_response("status", whitelist="map_id,position")
+        map_data = self.maps.get(map_name) or self.get_map(map_name)
+        if status.get("map_id") != map_data["guid"]:
+            return None
+        return status["position"]["x"], status["position"]["y"]
+
     def move(self, location_name: str) -> dict:
         """
         Creates a mission to move to a specified location and adds it to the mission queue.
 
+        The location may be qualified with a map name ('map_name:location_name'), in
+        which case the mission first switches the robot to that map. If an occupancy
+        cache is configured, unreachable locations are rejected before the mission is
+        queued.
+
         Args:
             location (str): The location to move to.
 
@@ -672,23 +1211,48 @@ class MIRBase:
         """
         mission_name = f"dock_to_{location_name}_{dt.datetime.now()}"
 
-        guid = self.locations_dict[self.map_name][location_name]["guid"]
-        return self.post_mission_to_queue(mission_name, [{"move": {"position": guid}}])
+        map_name, position = self.resolve_location(location_name)
+        with self._mission_lock:
+            if self.occupancy is not None:
+                self.check_reachable(location_name)
+            actions = self.map_switch_actions(map_name)
+            queue_entry = self.post_mission_to_queue(
+                mission_name,
+                [*actions, {"move": {"position": position["guid"]}}],
+                action_type="move",
+                location=location_name,
+                target=(map_name, position),
+            )
+            self.set_current_map(map_name)
+            return queue_entry
 
-    def dock(self, location_name: str) -> dict:
+    def dock(self, location_name: str, *, action_type: str = "docking") -> dict:
         """
         Creates a mission to dock at a specified location and adds it to the mission queue.
 
+        The location may be qualified with a map name, as for move.
+
         Args:
             location (str): The location to dock at.
+            action_type (str): The kind of mission recorded in the mission history.
 
         Returns:
             dict: The response from posting the mission to the queue.
         """
         mission_name = f"dock_to_{location_name}_{dt.datetime.now()}"
 
-        guid = self.locations_dict[self.map_name][location_name]["guid"]
-        return self.post_mission_to_queue(mission_name, [{"docking": {"marker": guid}}])
+        map_name, position = self.resolve_location(location_name)
+        with self._mission_lock:
+            actions = self.map_switch_actions(map_name)
+            queue_entry = self.post_mission_to_queue(
+                mission_name,
+                [*actions, {"docking": {"marker": position["guid"]}}],
+                action_type=action_type,
+                location=location_name,
+                target=(map_name, position),
+            )
+            self.set_current_map(map_name)
+            return queue_entry
 
     def wait(self, delay_seconds: float) -> dict:
         """
@@ -702,4 +1266,9 @@ class MIRBase:
         """
         time = str(dt.timedelta(seconds=delay_seconds))
         mission_name = f"wait_for_{time}_{dt.datetime.now()}"
-        return self.post_mission_to_queue(mission_name, [{"wait": {"time": time}}])
+        return self.post_mission_to_queue(
+            mission_name,
+            [{"wait": {"time": time}}],
+            action_type="wait",
+            target=self.last_target,
+        )
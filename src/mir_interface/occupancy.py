@@ -0,0 +1,493 @@
+"""
+Occupancy grids decoded from MiR map images, for local reachability checks.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from mir_interface.mir_interface import MIRBase
+
+MAP_FIELDS = "map,origin_x,origin_y,resolution"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+class OccupancyGrid:
+    """Boolean occupancy grid of a map, with vectorized free-space and path checks."""
+
+    def __init__(
+        self,
+        occupied: np.ndarray,
+        origin_x: float,
+        origin_y: float,
+        resolution: float,
+        image_hash: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize the grid.
+
+        Args:
+            occupied (np.ndarray): 2D boolean array, True where the map is occupied. Row 0 is the top of the map image.
+            origin_x (float): X coordinate in meters of the bottom-left corner of the map.
+            origin_y (float): Y coordinate in meters of the bottom-left corner of the map.
+            resolution (float): Size of a grid cell in meters.
+            image_hash (str): Hash of the map image and threshold the grid was decoded from, if known.
+        """
+        self.occupied = occupied
+        self.origin_x = origin_x
+        self.origin_y = origin_y
+        self.resolution = resolution
+        self.image_hash = image_hash
+        self._inflated = {}
+
+    @classmethod
+    def from_map(cls, map_data: dict, occupied_below: int = 128) -> "OccupancyGrid":
+        """
+        Decode the grid from a MiR map resource.
+
+        Pixels darker than `occupied_below` are occupied, unless they are transparent.
+
+        Args:
+            map_data (dict): The map resource, with the base64 PNG in 'map'.
+            occupied_below (int): Gray level below which a pixel is an obstacle.
+
+        Returns:
+            OccupancyGrid: The decoded grid.
+        """
+        image = decode_png(base64.b64decode(map_data["map"]))
+        channels = image.shape[2]
+        gray = image[..., :3].mean(axis=2) if channels >= 3 else image[..., 0]
+        occupied = gray < occupied_below
+        if channels in {2, 4}:
+            occupied &= image[..., -1] > 127
+        return cls(
+            occupied,
+            float(map_data.get("origin_x") or 0.0),
+            float(map_data.get("origin_y") or 0.0),
+            float(map_data["resolution"]),
+            image_hash=image_hash(map_data, occupied_below),
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "OccupancyGrid":
+        """
+        Load a grid saved with save(), memory-mapping the cell data.
+
+        Args:
+            path (str | Path): The .npy file of the grid. Metadata is read from the .json next to it.
+
+        Returns:
+            OccupancyGrid: The loaded grid.
+        """
+        path = Path(path)
+        metadata = json.loads(path.with_suffix(".json").read_text())
+        return cls(np.load(path, mmap_mode="r"), **metadata)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Save the grid as a .npy file with a .json metadata file next to it.
+
+        Both files are written to temporary files and moved into place, so readers
+        never see a partially written grid. The metadata is replaced last, so a grid
+        whose metadata does not match its image hash is never mistaken for current.
+
+        Args:
+            path (str | Path): The .npy file to write.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        metadata = {
+            "origin_x": self.origin_x,
+            "origin_y": self.origin_y,
+            "resolution": self.resolution,
+            "image_hash": self.image_hash,
+        }
+        _write_atomic(
+            path, lambda file: np.save(file, np.asarray(self.occupied, dtype=bool))
+        )
+        _write_atomic(
+            path.with_suffix(".json"),
+            lambda file: file.write(json.dumps(metadata).encode()),
+        )
+
+    def cells(self, x: np.ndarray, y: np.ndarray) -> tuple:
+        """
+        Convert map coordinates to grid cells.
+
+        Args:
+            x (array-like): X coordinates in meters.
+            y (array-like): Y coordinates in meters.
+
+        Returns:
+            tuple: Row and column index arrays. Indices may lie outside the grid.
+        """
+        height = self.occupied.shape[0]
+        cols = np.floor((np.asarray(x, dtype=float) - self.origin_x) / self.resolution)
+        rows = (
+            height
+            - 1
+            - np.floor((np.asarray(y, dtype=float) - self.origin_y) / self.resolution)
+        )
+        return rows.astype(int), cols.astype(int)
+
+    def is_free(
+        self, x: np.ndarray, y: np.ndarray, clearance: float = 0.0
+    ) -> np.ndarray:
+        """
+        Check whether positions lie in free space.
+
+        Args:
+            x (array-like): X coordinates in meters.
+            y (array-like): Y coordinates in meters.
+            clearance (float): Required distance in meters to the nearest obstacle.
+
+        Returns:
+            np.ndarray: True for each position that is inside the map and free.
+        """
+        occupied = self.inflated(clearance)
+        rows, cols = self.cells(x, y)
+        height, width = occupied.shape
+        inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+        free = np.zeros(np.shape(rows), dtype=bool)
+        free[inside] = ~occupied[rows[inside], cols[inside]]
+        return free
+
+    def inflated(self, clearance: float) -> np.ndarray:
+        """
+        Occupancy with obstacles grown by `clearance` meters. Results are cached per clearance.
+
+        Args:
+            clearance (float): Distance in meters to grow obstacles by.
+
+        Returns:
+            np.ndarray: Boolean occupancy grid.
+        """
+        radius = int(np.ceil(clearance / self.resolution))
+        if radius == 0:
+            return np.asarray(self.occupied, dtype=bool)
+        if radius not in self._inflated:
+            self._inflated[radius] = _dilate(
+                np.asarray(self.occupied, dtype=bool), radius
+            )
+        return self._inflated[radius]
+
+    def path_length(
+        self,
+        start: tuple,
+        goal: tuple,
+        clearance: float = 0.0,
+        cell_size: float = 0.2,
+    ) -> Optional[float]:
+        """
+        Approximate length of the shortest free path between two positions.
+
+        The grid is coarsened to `cell_size` (a coarse cell is free only if all of
+        its cells are) and searched with a vectorized wavefront that alternates 4-
+        and 8-connected steps, which approximates Euclidean distance.
+
+        Args:
+            start (tuple): (x, y) of the start position in meters.
+            goal (tuple): (x, y) of the goal position in meters.
+            clearance (float): Required distance in meters to obstacles along the path.
+            cell_size (float): Size of a search cell in meters.
+
+        Returns:
+            float: The approximate path length in meters, or None if the goal is unreachable.
+        """
+        factor = max(1, round(cell_size / self.resolution))
+        free = _coarsen(~self.inflated(clearance), factor)
+        height, width = free.shape
+
+        (start_row, goal_row), (start_col, goal_col) = (
+            index // factor for index in self.cells(*zip(start, goal, strict=True))
+        )
+        for row, col in ((start_row, start_col), (goal_row, goal_col)):
+            if not (0 <= row < height and 0 <= col < width):
+                return None
+        free[start_row, start_col] = free[goal_row, goal_col] = True
+
+        reached = np.zeros_like(free)
+        reached[start_row, start_col] = True
+        frontier = reached.copy()
+        steps = 0
+        while not reached[goal_row, goal_col]:
+            if not frontier.any():
+                return None
+            steps += 1
+            grown = _dilate(frontier, 1, diagonal=steps % 2 == 0)
+            frontier = grown & free & ~reached
+            reached |= frontier
+        return steps * factor * self.resolution
+
+
+class OccupancyCache:
+    """Decodes map images once and caches the grids on disk by map guid."""
+
+    def __init__(self, cache_dir: Union[str, Path], occupied_below: int = 128) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str | Path): Directory for the cached grids.
+            occupied_below (int): Gray level below which a map pixel is an obstacle.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.occupied_below = occupied_below
+        self._grids = {}
+        self._lock = threading.Lock()
+
+    def get(self, base: "MIRBase", map_guid: str) -> OccupancyGrid:
+        """
+        Return the grid of a map, loading it from disk or decoding it from the robot.
+
+        The first use of a map, and the first use after invalidate(), downloads the
+        map image and compares its hash with the cached grid. Only a changed image
+        is decoded again. Later uses are served from memory until invalidate() is
+        called, e.g. after the map was edited.
+
+        Args:
+            base (MIRBase): The driver used to download the map.
+            map_guid (str): The guid of the map.
+
+        Returns:
+            OccupancyGrid: The memory-mapped grid of the map.
+        """
+        with self._lock:
+            if map_guid not in self._grids:
+                self._grids[map_guid] = self._load(base, map_guid)
+            return self._grids[map_guid]
+
+    def invalidate(self, map_guid: Optional[str] = None) -> None:
+        """
+        Make the next get() check a map against the robot again.
+
+        Args:
+            map_guid (str): The map to check again. Defaults to every map.
+        """
+        with self._lock:
+            if map_guid is None:
+                self._grids = {}
+            else:
+                self._grids.pop(map_guid, None)
+
+    def clear(self, map_guid: Optional[str] = None) -> None:
+        """
+        Delete cached grids from memory and disk.
+
+        Args:
+            map_guid (str): The map to delete. Defaults to every map.
+        """
+        with self._lock:
+            if map_guid is None:
+                paths = self._paths()
+                self._grids = {}
+            else:
+                paths = [self.cache_dir / f"{map_guid}.npy"]
+                self._grids.pop(map_guid, None)
+            for path in paths:
+                path.unlink(missing_ok=True)
+                path.with_suffix(".json").unlink(missing_ok=True)
+
+    def _load(self, base: "MIRBase", map_guid: str) -> OccupancyGrid:
+        """Load the cached grid of a map if it matches the map image, decoding it otherwise."""
+        map_data = base.receive_response(f"maps/{map_guid}", whitelist=MAP_FIELDS)
+        path = self.cache_dir / f"{map_guid}.npy"
+        if path.exists() and path.with_suffix(".json").exists():
+            grid = OccupancyGrid.load(path)
+            if grid.image_hash == image_hash(map_data, self.occupied_below):
+                return grid
+        OccupancyGrid.from_map(map_data, self.occupied_below).save(path)
+        return OccupancyGrid.load(path)
+
+    def _paths(self) -> list:
+        """The .npy files of all cached grids."""
+        if not self.cache_dir.exists():
+            return []
+        return list(self.cache_dir.glob("*.npy"))
+
+
+def image_hash(map_data: dict, occupied_below: int) -> str:
+    """
+    Hash the parts of a map resource an occupancy grid is decoded from.
+
+    Args:
+        map_data (dict): The map resource, with the base64 PNG in 'map'.
+        occupied_below (int): Gray level below which a pixel is an obstacle.
+
+    Returns:
+        str: A hex digest that changes whenever the decoded grid would.
+    """
+    digest = hashlib.sha256(map_data["map"].encode())
+    for field in ("origin_x", "origin_y", "resolution"):
+        digest.update(f"|{map_data.get(field)}".encode())
+    digest.update(f"|{occupied_below}".encode())
+    return digest.hexdigest()
+
+
+def decode_png(data: bytes) -> np.ndarray:
+    """
+    Decode a non-interlaced, 8-bit PNG image.
+
+    Args:
+        data (bytes): The PNG file contents.
+
+    Returns:
+        np.ndarray: Array of shape (height, width, channels). Palette images are expanded to RGB(A).
+
+    Raises:
+        ValueError: If the data is not a PNG image in a supported format.
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("Map image is not a PNG file.")
+
+    chunks, palette, transparency = [], None, None
+    depth = color_type = interlace = None
+    for kind, body in _png_chunks(data):
+        if kind == b"IHDR":
+            width, height, depth, color_type, _, _, interlace = struct.unpack(
+                ">IIBBBBB", body
+            )
+        elif kind == b"PLTE":
+            palette = np.frombuffer(body, dtype=np.uint8).reshape(-1, 3)
+        elif kind == b"tRNS":
+            transparency = np.frombuffer(body, dtype=np.uint8)
+        elif kind == b"IDAT":
+            chunks.append(body)
+
+    if depth != 8 or interlace or color_type not in PNG_CHANNELS:
+        raise ValueError(
+            f"Unsupported PNG format (bit depth {depth}, color type {color_type}, interlace {interlace})."
+        )
+    channels = PNG_CHANNELS[color_type]
+    raw = np.frombuffer(zlib.decompress(b"".join(chunks)), dtype=np.uint8)
+    image = _unfilter(raw.reshape(height, width * channels + 1), channels)
+    image = image.reshape(height, width, channels)
+
+    if color_type == 3:
+        indices = image[..., 0]
+        if transparency is not None:
+            alpha = np.full(len(palette), 255, dtype=np.uint8)
+            alpha[: len(transparency)] = transparency
+            palette = np.column_stack([palette, alpha])
+        image = palette[indices]
+    return image
+
+
+def _png_chunks(data: bytes) -> Iterator[tuple]:
+    """Yield the (type, body) pairs of the chunks of a PNG file, up to IEND."""
+    offset = len(PNG_SIGNATURE)
+    while offset < len(data):
+        (length,) = struct.unpack(">I", data[offset : offset + 4])
+        kind = data[offset + 4 : offset + 8]
+        if kind == b"IEND":
+            return
+        yield kind, data[offset + 8 : offset + 8 + length]
+        offset += 12 + length
+
+
+def _unfilter(rows: np.ndarray, bpp: int) -> np.ndarray:
+    """Reverse the PNG scanline filters. The first byte of each row is its filter type."""
+    height, stride = rows.shape[0], rows.shape[1] - 1
+    out = np.zeros((height, stride), dtype=np.uint8)
+    previous = np.zeros(stride, dtype=np.uint8)
+    for index in range(height):
+        kind, line = rows[index, 0], rows[index, 1:]
+        if kind == 0:
+            current = line.copy()
+        elif kind == 1:
+            current = np.cumsum(line.reshape(-1, bpp), axis=0, dtype=np.uint8).ravel()
+        elif kind == 2:
+            current = line + previous
+        elif kind in {3, 4}:
+            current = _unfilter_sequential(line, previous, bpp, kind)
+        else:
+            raise ValueError(f"Invalid PNG filter type {kind}.")
+        out[index] = current
+        previous = current
+    return out
+
+
+def _unfilter_sequential(
+    line: np.ndarray, previous: np.ndarray, bpp: int, kind: int
+) -> np.ndarray:
+    """Reverse the Average (3) or Paeth (4) filter, which depend on the reconstructed left byte."""
+    line, above = line.tolist(), previous.tolist()
+    current = [0] * len(line)
+    for i, value in enumerate(line):
+        left = current[i - bpp] if i >= bpp else 0
+        up = above[i]
+        if kind == 3:
+            predictor = (left + up) // 2
+        else:
+            upper_left = above[i - bpp] if i >= bpp else 0
+            estimate = left + up - upper_left
+            distances = (
+                abs(estimate - left),
+                abs(estimate - up),
+                abs(estimate - upper_left),
+            )
+            predictor = (left, up, upper_left)[distances.index(min(distances))]
+        current[i] = (value + predictor) & 0xFF
+    return np.array(current, dtype=np.uint8)
+
+
+def _dilate(mask: np.ndarray, radius: int, diagonal: bool = True) -> np.ndarray:
+    """Grow the true cells of a mask by `radius` cells, as a square, or as a cross without diagonals."""
+    if radius == 0:
+        return mask.copy()
+    if not diagonal:
+        grown = mask.copy()
+        grown[1:] |= mask[:-1]
+        grown[:-1] |= mask[1:]
+        grown[:, 1:] |= mask[:, :-1]
+        grown[:, :-1] |= mask[:, 1:]
+        return grown
+    grown = mask.copy()
+    for shift in range(1, radius + 1):
+        grown[shift:] |= mask[:-shift]
+        grown[:-shift] |= mask[shift:]
+    result = grown.copy()
+    for shift in range(1, radius + 1):
+        result[:, shift:] |= grown[:, :-shift]
+        result[:, :-shift] |= grown[:, shift:]
+    return result
+
+
+def _coarsen(free: np.ndarray, factor: int) -> np.ndarray:
+    """Combine factor x factor blocks of a free-space mask, keeping a block free only if all its cells are."""
+    if factor == 1:
+        return free.copy()
+    height, width = free.shape
+    padded = np.zeros(
+        (-(-height // factor) * factor, -(-width // factor) * factor), dtype=bool
+    )
+    padded[:height, :width] = free
+    blocks = padded.reshape(
+        padded.shape[0] // factor, factor, padded.shape[1] // factor, factor
+    )
+    return blocks.all(axis=(1, 3))
+
+
+def _write_atomic(path: Path, write: Callable) -> None:
+    """Write a file through a temporary file in the same directory and move it into place."""
+    descriptor, temporary = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            write(file)
+        Path(temporary).replace(path)
+    except BaseException:
+        Path(temporary).unlink(missing_ok=True)
+        raise
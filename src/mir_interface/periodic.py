@@ -0,0 +1,55 @@
+"""
+Background helper for running driver housekeeping on a fixed interval.
+"""
+
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Runs a callable on a daemon thread every `interval` seconds until stopped."""
+
+    def __init__(
+        self, interval: float, target: Callable[[], object], name: str
+    ) -> None:
+        """
+        Initialize the task. The thread is not started until start() is called.
+
+        Args:
+            interval (float): Seconds to wait between calls.
+            target (callable): The function to call. Exceptions are logged, not raised.
+            name (str): Name of the background thread.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive.")
+        self.interval = interval
+        self.target = target
+        self.name = name
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start calling the target in the background."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the background thread, waiting up to `timeout` seconds for it to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        """Call the target every interval until stopped."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.target()
+            except Exception:
+                logger.exception("Periodic task %s failed", self.name)
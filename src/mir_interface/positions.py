@@ -0,0 +1,120 @@
+"""
+Incremental tracking of the positions defined on a MiR map.
+"""
+
+import json
+import threading
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from mir_interface.mir_interface import MIRBase
+
+POSITION_FIELDS = "guid,name,type_id,pos_x,pos_y,orientation"
+
+
+class PositionTracker:
+    """Keeps the entry for one map in MIRBase.locations_dict in sync with the robot."""
+
+    def __init__(self, base: "MIRBase", map_name: str) -> None:
+        """
+        Initialize an empty tracker for a map of the given MiR base.
+
+        Args:
+            base (MIRBase): The driver whose location index is updated.
+            map_name (str): The name of the tracked map.
+        """
+        self.base = base
+        self.map_name = map_name
+        self.map_guid = None
+        self._lock = threading.Lock()
+        self._signatures = {}
+        self._positions = {}
+        self._type_names = {}
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the positions of the map have been fetched at least once."""
+        return self.map_guid is not None
+
+    def refresh(self, current_map: Optional[dict] = None) -> dict:
+        """
+        Sync the location index with the robot.
+
+        All positions of the map, with their coordinates, are requested in a single
+        search and diffed against the cache, so moved positions are picked up as well
+        as added and removed ones. Position types are looked up once per type. If the
+        map behind `map_name` was replaced by a new map, the cache is rebuilt for it.
+        The updated index is published to MIRBase.locations_dict in one assignment.
+
+        Args:
+            current_map (dict): The map data, if already known. Otherwise it is requested by name.
+
+        Returns:
+            dict: The names of added, changed and removed positions, and whether the map changed.
+        """
+        with self._lock:
+            if current_map is None:
+                current_map = self.base.get_map(self.map_name)
+            map_changed = current_map["guid"] != self.map_guid
+            if map_changed:
+                self.map_guid = current_map["guid"]
+                self._signatures = {}
+                self._positions = {}
+
+            search = {
+                "filters": [
+                    {"fieldname": "map_id", "operator": "=", "value": self.map_guid}
+                ]
+            }
+            listed = self.base.receive_response(
+                "positions", search=search, whitelist=POSITION_FIELDS
+            )
+            signatures = {
+                entry["guid"]: json.dumps(entry, sort_keys=True) for entry in listed
+            }
+
+            removed = [
+                self._positions.pop(guid)[0]
+                for guid in set(self._signatures) - set(signatures)
+                if guid in self._positions
+            ]
+            added, changed = [], []
+            for entry in listed:
+                guid = entry["guid"]
+                if self._signatures.get(guid) == signatures[guid]:
+                    continue
+                (changed if guid in self._signatures else added).append(
+                    entry.get("name", guid)
+                )
+                self._positions.pop(guid, None)
+                position = self._position_of(entry)
+                if position is not None:
+                    self._positions[guid] = position
+            self._signatures = signatures
+
+            self.base.publish_positions(current_map, dict(self._positions.values()))
+
+        return {
+            "added": added,
+            "changed": changed,
+            "removed": removed,
+            "map_changed": map_changed,
+        }
+
+    def _position_of(self, entry: dict) -> Optional[tuple]:
+        """
+        Convert a searched position to a location index entry.
+
+        Returns:
+            tuple: The (name, details) pair, or None for entry positions.
+        """
+        type_id = entry.get("type_id")
+        if type_id not in self._type_names:
+            position_type = self.base.receive_response(f"position_types/{type_id}")
+            self._type_names[type_id] = position_type.get("name", "")
+        if "entry" in self._type_names[type_id]:
+            return None
+
+        details = dict(entry)
+        name = details.pop("name", entry["guid"])
+        return name, details
@@ -0,0 +1,358 @@
+"""
+HTTP transports used by the MiR driver, including cassette record and replay.
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Optional, Union
+from urllib.parse import urlsplit
+
+import requests
+
+REDACTED = "<redacted>"
+CASSETTE_VERSION = 1
+
+
+class HTTPTransport:
+    """Default transport, sending requests to the MiR base over pooled sessions."""
+
+    def __init__(self) -> None:
+        """
+        Initialize the transport. Each thread gets its own persistent requests session,
+        since sessions are not safe to share between threads.
+        """
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """The requests session of the calling thread."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        json: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> requests.Response:
+        """
+        Send a single HTTP request.
+
+        Args:
+            method (str): The HTTP method (GET, POST, PUT, DELETE).
+            url (str): The full URL to send the request to.
+            json (dict): An optional JSON payload.
+            headers (dict): Optional request headers.
+            timeout (float): Optional request timeout in seconds.
+
+        Returns:
+            requests.Response: The response from the MiR base.
+        """
+        return self.session.request(
+            method, url, json=json, headers=headers, timeout=timeout
+        )
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Wait between polls of the MiR base. Replay transports scale this wait.
+
+        Args:
+            seconds (float): The number of seconds to wait.
+        """
+        time.sleep(seconds)
+
+
+class RecordingTransport:
+    """Transport that forwards requests and records them, with timing, to a cassette file."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        transport: Optional[HTTPTransport] = None,
+        redact: Optional[list] = None,
+    ) -> None:
+        """
+        Initialize the recorder and start a new session in the cassette.
+
+        Args:
+            path (str | Path): The cassette file to append recorded calls to. Each
+                recorder appends a new session, which can be replayed on its own.
+            transport: The transport to forward requests to. Defaults to HTTPTransport.
+            redact (list of str): Secret strings (such as the MiR key) to strip from recorded payloads.
+        """
+        self.path = Path(path)
+        self.transport = transport or HTTPTransport()
+        self.redact = [secret for secret in (redact or []) if secret]
+        self.start = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = {
+            "version": CASSETTE_VERSION,
+            "recorded": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        }
+        self._write(header)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        json: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> requests.Response:
+        """
+        Forward a request to the wrapped transport and record the exchange.
+
+        Args:
+            method (str): The HTTP method (GET, POST, PUT, DELETE).
+            url (str): The full URL to send the request to.
+            json (dict): An optional JSON payload.
+            headers (dict): Optional request headers. These are never recorded.
+            timeout (float): Optional request timeout in seconds.
+
+        Returns:
+            requests.Response: The response from the wrapped transport.
+        """
+        sent = time.monotonic()
+        entry = {
+            "t": round(sent - self.start, 4),
+            "method": method,
+            "path": self._scrub(_path_of(url)),
+            "body": self._scrub(json),
+        }
+        try:
+            response = self.transport.request(
+                method, url, json=json, headers=headers, timeout=timeout
+            )
+        except requests.RequestException as error:
+            entry["dt"] = round(time.monotonic() - sent, 4)
+            entry["error"] = self._scrub(str(error))
+            self._write(entry)
+            raise
+
+        entry["dt"] = round(time.monotonic() - sent, 4)
+        entry["status"] = response.status_code
+        entry["text"] = self._scrub(response.text)
+        self._write(entry)
+        return response
+
+    def sleep(self, seconds: float) -> None:
+        """Wait between polls, using the wrapped transport."""
+        self.transport.sleep(seconds)
+
+    def _scrub(self, value: Any) -> Any:
+        """Replace any configured secret in a string or JSON payload."""
+        if value is None or not self.redact:
+            return value
+        text = value if isinstance(value, str) else json.dumps(value)
+        for secret in self.redact:
+            text = text.replace(secret, REDACTED)
+        return text if isinstance(value, str) else json.loads(text)
+
+    def _write(self, entry: dict) -> None:
+        """Append a single compact JSON line to the cassette."""
+        line = json.dumps(entry, separators=(",", ":"))
+        with self._lock, self.path.open("a") as cassette:
+            cassette.write(line + "\n")
+
+
+class ReplayResponse:
+    """Minimal stand-in for requests.Response served from a cassette."""
+
+    def __init__(self, status_code: int, text: str) -> None:
+        """
+        Initialize the response with a recorded status code and body.
+        """
+        self.status_code = status_code
+        self.text = text
+
+
+class ReplayTransport:
+    """Transport that serves recorded responses from a cassette file."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        latency_scale: float = 1.0,
+        repeat_last: bool = True,
+        session: int = -1,
+    ) -> None:
+        """
+        Initialize the replay transport.
+
+        Recorded calls are matched by method and path, in recorded order. Request
+        bodies are not matched, since mission names embed timestamps.
+
+        Args:
+            path (str | Path): The cassette file to replay.
+            latency_scale (float): Multiplier on recorded latency and on the driver's
+                polling waits. 1.0 replays at recorded speed, 0.5 at double speed
+                and 0 with zero latency.
+            repeat_last (bool): Serve the last recorded response for a call once its
+                recordings run out, so extra polling does not fail the replay.
+            session (int): Index of the recorded session to replay. Defaults to the last one.
+        """
+        if latency_scale < 0:
+            raise ValueError("latency_scale must not be negative.")
+        self.latency_scale = latency_scale
+        self.repeat_last = repeat_last
+        self.entries = load_cassette(path, session)
+        self.calls = []
+        self.start = time.monotonic()
+        self._pending = defaultdict(deque)
+        self._last = {}
+        self._lock = threading.Lock()
+        for entry in self.entries:
+            self._pending[(entry["method"], entry["path"])].append(entry)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        json: Optional[dict] = None,  # noqa: ARG002
+        headers: Optional[dict] = None,  # noqa: ARG002
+        timeout: Optional[float] = None,  # noqa: ARG002
+    ) -> ReplayResponse:
+        """
+        Serve the next recorded response for the given method and URL.
+
+        Args:
+            method (str): The HTTP method (GET, POST, PUT, DELETE).
+            url (str): The full URL of the request.
+            json (dict): Ignored, accepted for interface compatibility.
+            headers (dict): Ignored, accepted for interface compatibility.
+            timeout (float): Ignored, accepted for interface compatibility.
+
+        Returns:
+            ReplayResponse: The recorded response.
+
+        Raises:
+            ValueError: If the cassette has no recording for the request.
+        """
+        key = (method, _path_of(url))
+        with self._lock:
+            pending = self._pending[key]
+            if pending:
+                entry = pending.popleft()
+                self._last[key] = entry
+            elif self.repeat_last and key in self._last:
+                entry = self._last[key]
+            else:
+                raise ValueError(f"No recorded response for {method} {key[1]}")
+            delay = entry.get("dt", 0.0) * self.latency_scale
+            self.calls.append(
+                {
+                    "t": time.monotonic() - self.start,
+                    "method": method,
+                    "path": key[1],
+                    "dt": delay,
+                }
+            )
+
+        if delay > 0:
+            time.sleep(delay)
+        if "error" in entry:
+            raise requests.RequestException(entry["error"])
+        return ReplayResponse(entry["status"], entry["text"])
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Wait between polls, scaled like the recorded latency.
+
+        Args:
+            seconds (float): The unscaled number of seconds to wait.
+        """
+        delay = seconds * self.latency_scale
+        if delay > 0:
+            time.sleep(delay)
+
+    def summary(self) -> dict:
+        """
+        Summarize the calls served so far, for comparison with cassette_summary.
+
+        Returns:
+            dict: Call counts and served latency per "METHOD path", plus totals.
+        """
+        with self._lock:
+            return cassette_summary(self.calls)
+
+
+def load_cassette(path: Union[str, Path], session: Optional[int] = -1) -> list:
+    """
+    Load the recorded calls of one session from a cassette file.
+
+    Every RecordingTransport starts a new session in the cassette, so restarts
+    of a recording node do not mix their calls.
+
+    Args:
+        path (str | Path): The cassette file to read.
+        session (int): Index of the session to load, negative values counting from
+            the end. None loads the calls of all sessions.
+
+    Returns:
+        list: The recorded call entries, in recorded order.
+    """
+    sessions = []
+    with Path(path).open() as cassette:
+        for line in cassette:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "method" in entry:
+                if not sessions:
+                    sessions.append([])
+                sessions[-1].append(entry)
+            else:
+                sessions.append([])
+
+    if session is None:
+        return [entry for entries in sessions for entry in entries]
+    if not sessions:
+        return []
+    return sessions[session]
+
+
+def cassette_summary(entries: list) -> dict:
+    """
+    Summarize recorded or replayed calls.
+
+    Args:
+        entries (list of dict): Call entries with "method", "path" and "dt" keys.
+
+    Returns:
+        dict: Call counts and total latency per "METHOD path", plus overall totals
+            and the wall-clock duration from the first call to the end of the last.
+    """
+    calls = {}
+    for entry in entries:
+        key = f"{entry['method']} {entry['path']}"
+        stats = calls.setdefault(key, {"count": 0, "seconds": 0.0})
+        stats["count"] += 1
+        stats["seconds"] += entry.get("dt", 0.0)
+    timed = [entry for entry in entries if "t" in entry]
+    duration = 0.0
+    if timed:
+        duration = max(entry["t"] + entry.get("dt", 0.0) for entry in timed) - min(
+            entry["t"] for entry in timed
+        )
+    return {
+        "total_calls": len(entries),
+        "total_seconds": sum(entry.get("dt", 0.0) for entry in entries),
+        "duration": duration,
+        "calls": calls,
+    }
+
+
+def _path_of(url: str) -> str:
+    """Strip scheme and host from a URL so cassettes replay against any robot."""
+    parts = urlsplit(url)
+    return f"{parts.path}?{parts.query}" if parts.query else parts.path
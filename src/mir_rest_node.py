@@ -1,6 +1,7 @@
 """REST-based node for UR robots"""
 
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional
 
 from madsci.common.types.location_types import LocationArgument
 from madsci.common.types.node_types import RestNodeConfig
@@ -8,7 +9,12 @@ from madsci.node_module.helpers import action
 from madsci.node_module.rest_node_module import RestNode
 from typing_extensions import Annotated
 
+from mir_interface.charging import ChargingScheduler
+from mir_interface.history import MissionHistory
 from mir_interface.mir_interface import MIRBase
+from mir_interface.occupancy import OccupancyCache
+from mir_interface.periodic import PeriodicTask
+from mir_interface.transport import RecordingTransport
 
 
 class MIRConfig(RestNodeConfig):
@@ -16,7 +22,31 @@ class MIRConfig(RestNodeConfig):
 
     mir_host: str = "mirbase2.cels.anl.gov"
     map_name: str = "RPL"
+    map_entry_positions: Optional[Dict[str, str]] = None
+    """Position on each map at which the robot is localized when a mission switches to that map"""
     mir_key: str
+    cassette_path: Optional[str] = None
+    """If set, every request to the MiR base is recorded to this cassette file"""
+    position_refresh_interval: Optional[float] = 60.0
+    """Seconds between checks for positions changed on the robot. None disables the check"""
+    mission_history_path: Optional[str] = None
+    """If set, missions sent by this node are recorded to this SQLite database"""
+    mission_tracking_interval: float = 5.0
+    """Seconds between checks of the mission queue for started and finished missions"""
+    robot_timezone: Optional[str] = None
+    """IANA time zone of the MiR base's clock, e.g. 'America/Chicago'. Defaults to the host's time zone"""
+    occupancy_cache_dir: Optional[str] = None
+    """If set, map occupancy grids are cached here and unreachable moves are rejected before queueing"""
+    charger_location: Optional[str] = None
+    """Docking location of the charger. If set, the robot charges opportunistically while idle"""
+    charge_below_percentage: float = 60.0
+    """Battery percentage below which idle time is used for charging"""
+    safe_battery_percentage: float = 40.0
+    """Minimum battery percentage at which a move may interrupt charging"""
+    max_charge_wait: float = 1800.0
+    """Maximum seconds a move waits for the safe battery percentage before failing"""
+    charging_check_interval: float = 30.0
+    """Seconds between checks of the battery and idle state"""
 
 
 class MIRNode(RestNode):
@@ -28,28 +58,98 @@ class MIRNode(RestNode):
     def startup_handler(self) -> None:
         """MIR startup handler."""
 
+        transport = None
+        if self.config.cassette_path:
+            transport = RecordingTransport(
+                self.config.cassette_path, redact=[self.config.mir_key]
+            )
+        history = None
+        if self.config.mission_history_path:
+            history = MissionHistory(self.config.mission_history_path)
+        occupancy = None
+        if self.config.occupancy_cache_dir:
+            occupancy = OccupancyCache(self.config.occupancy_cache_dir)
         self.mir = MIRBase(
             mir_ip=self.config.mir_host,
             mir_key=self.config.mir_key,
             map_name=self.config.map_name,
+            transport=transport,
+            history=history,
+            occupancy=occupancy,
+            entry_positions=self.config.map_entry_positions,
+            robot_timezone=self.config.robot_timezone,
         )
+        self.mission_tracker = None
+        if history is not None:
+            self.mission_tracker = PeriodicTask(
+                self.config.mission_tracking_interval,
+                self.mir.track_mission_progress,
+                name="mir_mission_tracking",
+            )
+            self.mission_tracker.start()
+        self.position_refresher = None
+        if self.config.position_refresh_interval:
+            self.position_refresher = PeriodicTask(
+                self.config.position_refresh_interval,
+                self.mir.refresh_all_positions,
+                name="mir_position_refresh",
+            )
+            self.position_refresher.start()
+        self.charging_scheduler = None
+        self.charging_task = None
+        if self.config.charger_location:
+            self.charging_scheduler = ChargingScheduler(
+                self.mir,
+                self.config.charger_location,
+                charge_below=self.config.charge_below_percentage,
+                safe_level=self.config.safe_battery_percentage,
+                max_charge_wait=self.config.max_charge_wait,
+                is_busy=lambda: self.node_status.busy,
+            )
+            self.charging_task = PeriodicTask(
+                self.config.charging_check_interval,
+                self.charging_scheduler.tick,
+                name="mir_charging",
+            )
+            self.charging_task.start()
+
+    def shutdown_handler(self) -> None:
+        """MIR shutdown handler."""
+        for task_name in ("mission_tracker", "position_refresher", "charging_task"):
+            task = getattr(self, task_name, None)
+            if task is not None:
+                task.stop()
+        mir = getattr(self, "mir", None)
+        if mir is not None and mir.history is not None:
+            mir.history.close()
 
     def status_handler(self) -> None:
         """Periodically called to update the current status of the node."""
-        if not self.node_status.busy:
-            robot_state = self.mir.get_state()
-            if robot_state == "ERROR":
-                self.node_status.errored = True
+        robot_state = self.mir.get_state()
+        if robot_state == "ERROR":
+            self.node_status.errored = True
 
     def state_handler(self) -> str:
         """Returns the current state of the MIR Base"""
         return self.mir.get_state()
 
+    def prepare_for_mission(self) -> None:
+        """Interrupts opportunistic charging before the MIR Base is sent somewhere"""
+        if self.charging_scheduler is not None:
+            self.charging_scheduler.prepare_for_mission()
+
+    def wait_for_mission(self) -> None:
+        """Waits for the last mission sent to the MIR Base and fails if it did not complete"""
+        state = self.mir.wait_until_finished()
+        if state != "Done":
+            raise ValueError(f"Mission ended in state '{state}'.")
+
     @action
     def move(
         self, target_location: Annotated[LocationArgument, "Target location name"]
     ) -> None:
         """Sends a move command to the MIR Base"""
+        self.prepare_for_mission()
         self.mir.move(
             location_name=target_location.representation["location_name"],
         )
@@ -60,10 +160,11 @@ class MIRNode(RestNode):
         target_location: Annotated[LocationArgument, "Name of the docking location"],
     ) -> None:
         """Sends a docking command to the MIR Base"""
+        self.prepare_for_mission()
         self.mir.dock(
             location_name=target_location.representation["location_name"],
         )
-        self.mir.wait_until_finished()
+        self.wait_for_mission()
 
     @action
     def queue_mission(
@@ -76,13 +177,42 @@ class MIRNode(RestNode):
         ],
     ) -> None:
         """Sends a mission to the MIR Base which could have multiple movement actions"""
+        self.prepare_for_mission()
         self.mir.post_mission_to_queue(
             mission_name=name,
             act_param_dict=mission,
             description=description,
             priority=priority,
         )
-        self.mir.wait_until_finished()
+        self.wait_for_mission()
+
+    @action
+    def refresh_locations(self) -> dict:
+        """Reloads positions that were added, changed or removed on the MIR Base, and re-checks edited map images"""
+        if self.mir.occupancy is not None:
+            self.mir.occupancy.invalidate()
+        return self.mir.refresh_all_positions()
+
+    @action
+    def switch_map(
+        self, map_name: Annotated[str, "Name of the map to activate"]
+    ) -> None:
+        """Queues a switch of the MIR Base to the given map, after the missions already queued"""
+        self.prepare_for_mission()
+        self.mir.switch_map(map_name)
+
+    @action
+    def mission_statistics(
+        self,
+        since_hours: Annotated[
+            Optional[float], "Only report missions finished in the last N hours"
+        ] = 24.0,
+    ) -> dict:
+        """Reports missions per hour, leg durations and failure rates from the mission history"""
+        if self.mir.history is None:
+            raise ValueError("Mission history is not enabled for this node.")
+        since = time.time() - since_hours * 3600 if since_hours else None
+        return self.mir.history.statistics(since)
 
     @action
     def abort_mission_queue(self) -> None:
@@ -0,0 +1,236 @@
+"""Shared fixtures: an in-memory fake of the MiR REST API."""
+
+import copy
+import datetime as dt
+import itertools
+import json
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+MAPS = {
+    "A": {"one": (1.0, 1.0), "two": (2.0, 2.0)},
+    "B": {"three": (3.0, 3.0)},
+}
+
+
+class FakeResponse:
+    """The parts of requests.Response the driver uses."""
+
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.text = "" if data is None else json.dumps(data)
+
+
+class FakeMiR:
+    """
+    Thread-safe fake of the MiR REST API.
+
+    Every search of the mission queue advances the oldest active mission one step,
+    Pending -> Executing -> Done, so waiting on a mission terminates. Finished
+    missions move the robot to their last position and switch its map.
+    """
+
+    def __init__(self, maps=None):
+        self.lock = threading.Lock()
+        self.requests = []
+        self.slept = 0.0
+        self.ids = itertools.count(2)
+        self.maps = {}
+        self.positions = {}
+        for map_name, positions in (maps or MAPS).items():
+            map_guid = f"map-{map_name}"
+            self.maps[map_name] = {"name": map_name, "guid": map_guid}
+            for name, (x, y) in positions.items():
+                self.add_position(map_name, name, x, y)
+        self.active_map = self.maps[next(iter(self.maps))]["guid"]
+        self.queue = [{"id": 1, "state": "Done", "mission_id": None}]
+        self.battery = 80.0
+        self.robot_position = (0.5, 0.5)
+        self.map_images = {}
+        self.missions = {}
+        self.timezone = dt.timezone.utc
+
+    def add_position(self, map_name, name, x, y):
+        """Create a position on a map and return its guid."""
+        guid = f"{map_name}-{name}"
+        self.positions[guid] = {
+            "guid": guid,
+            "name": name,
+            "map_id": self.maps[map_name]["guid"],
+            "type_id": 0,
+            "pos_x": x,
+            "pos_y": y,
+            "orientation": 0.0,
+        }
+        return guid
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.slept += seconds
+
+    def request(self, method, url, json=None, headers=None, timeout=None):
+        parts = urlsplit(url)
+        path = parts.path.split("/api/v2.0.0/", 1)[1].rstrip("/")
+        query = parse_qs(parts.query)
+        whitelist = query["whitelist"][0].split(",") if "whitelist" in query else None
+        with self.lock:
+            self.requests.append((method, path))
+            status, data = self.route(method, path.split("/"), json)
+        if isinstance(data, dict) and whitelist:
+            data = {key: data[key] for key in whitelist if key in data}
+        elif isinstance(data, list) and whitelist:
+            data = [
+                {key: item[key] for key in whitelist if key in item} for item in data
+            ]
+        return FakeResponse(status, data)
+
+    def route(self, method, path, body):  # noqa: C901, PLR0911, PLR0912
+        match (method, path):
+            case ("GET", ["maps"]):
+                return 200, list(self.maps.values())
+            case ("GET", ["maps", guid]):
+                return 200, {"guid": guid, **self.map_images.get(guid, {})}
+            case ("GET", ["maps", guid, "positions"]):
+                return 200, [
+                    {"guid": p["guid"], "name": p["name"], "type_id": p["type_id"]}
+                    for p in self.positions.values()
+                    if p["map_id"] == guid
+                ]
+            case ("POST", ["positions", "search"]):
+                return 200, [
+                    dict(p) for p in self.positions.values() if _matches(p, body)
+                ]
+            case ("GET", ["positions", guid]):
+                return 200, dict(self.positions[guid])
+            case ("GET", ["position_types", _]):
+                return 200, {"name": "Robot position"}
+            case ("GET", ["mission_groups"]):
+                return 200, [{"guid": "group"}]
+            case ("GET", ["mission_queue"]):
+                return 200, [dict(entry) for entry in self.queue]
+            case ("POST", ["mission_queue", "search"]):
+                self.advance()
+                return 200, [dict(e) for e in self.queue if _matches(e, body)]
+            case ("POST", ["mission_queue"]):
+                entry = {
+                    "id": next(self.ids),
+                    "state": "Pending",
+                    "mission_id": body["mission_id"],
+                    "started": None,
+                    "finished": None,
+                }
+                self.queue.append(entry)
+                return 201, dict(entry)
+            case ("GET", ["mission_queue", queue_id]):
+                return 200, dict(self.entry(int(queue_id)))
+            case ("DELETE", ["mission_queue", queue_id]):
+                self.finish(self.entry(int(queue_id)), "Aborted")
+                return 204, None
+            case ("DELETE", ["mission_queue"]):
+                for entry in self.queue:
+                    if entry["state"] in {"Pending", "Executing"}:
+                        self.finish(entry, "Aborted")
+                return 204, None
+            case ("POST", ["missions", "search"]):
+                return 200, [
+                    {"guid": m["guid"]}
+                    for m in self.missions.values()
+                    if _matches(m, body)
+                ]
+            case ("POST", ["missions"]):
+                mission = {"guid": f"mission-{body['name']}", "actions": [], **body}
+                self.missions[mission["guid"]] = mission
+                return 201, {"guid": mission["guid"]}
+            case ("POST", ["missions", guid, "actions"]):
+                actions = self.missions[guid]["actions"]
+                actions.append(
+                    {
+                        "guid": f"{guid}-{len(actions)}",
+                        "action_type": body["action_type"],
+                        "parameters": copy.deepcopy(body["parameters"]),
+                    }
+                )
+                return 201, dict(actions[-1])
+            case ("GET", ["missions", guid, "actions"]):
+                return 200, copy.deepcopy(self.missions[guid]["actions"])
+            case ("PUT", ["missions", guid, "actions", action_guid]):
+                for action in self.missions[guid]["actions"]:
+                    if action["guid"] == action_guid:
+                        action["parameters"] = copy.deepcopy(body["parameters"])
+                return 200, {}
+            case ("GET", ["status"]):
+                return 200, {
+                    "state_text": "Ready",
+                    "battery_percentage": self.battery,
+                    "map_id": self.active_map,
+                    "position": {
+                        "x": self.robot_position[0],
+                        "y": self.robot_position[1],
+                        "orientation": 0.0,
+                    },
+                }
+            case ("PUT", ["status"]):
+                self.active_map = body["map_id"]
+                return 200, {}
+        return 404, {"error": f"{method} {'/'.join(path)} not faked"}
+
+    def queued_actions(self, queue_id):
+        """The (action_type, {parameter: value}) pairs of a queued mission."""
+        mission = self.missions[self.entry(queue_id)["mission_id"]]
+        return [
+            (
+                action["action_type"],
+                {param["id"]: param["value"] for param in action["parameters"]},
+            )
+            for action in mission["actions"]
+        ]
+
+    def now(self):
+        """The robot's clock: a local time without zone, like the MiR API reports."""
+        return dt.datetime.now(self.timezone).replace(tzinfo=None).isoformat()
+
+    def entry(self, queue_id):
+        return next(entry for entry in self.queue if entry["id"] == queue_id)
+
+    def advance(self):
+        for entry in self.queue:
+            if entry["state"] == "Pending":
+                entry["state"] = "Executing"
+                entry["started"] = self.now()
+                return
+            if entry["state"] == "Executing":
+                self.finish(entry, "Done")
+                mission = self.missions.get(entry["mission_id"], {"actions": []})
+                for action in mission["actions"]:
+                    params = {p["id"]: p["value"] for p in action["parameters"]}
+                    if action["action_type"] == "switch_map":
+                        self.active_map = params["map"]
+                        target = params["position"]
+                    else:
+                        target = params.get("position") or params.get("marker")
+                    if target in self.positions:
+                        position = self.positions[target]
+                        self.robot_position = (position["pos_x"], position["pos_y"])
+                return
+
+    def finish(self, entry, state):
+        entry["state"] = state
+        entry["finished"] = self.now()
+
+
+def _matches(item, search):
+    """Apply the '=' and '>' filters of a MiR search body."""
+    for search_filter in (search or {}).get("filters", []):
+        value = item.get(search_filter["fieldname"])
+        if search_filter["operator"] == "=" and value != search_filter["value"]:
+            return False
+        if search_filter["operator"] == ">" and not value > search_filter["value"]:
+            return False
+    return True
+
+
+@pytest.fixture
+def fake_mir():
+    return FakeMiR()
@@ -0,0 +1,178 @@
+import pytest
+
+from mir_interface.charging import ChargingScheduler
+from mir_interface.history import MissionHistory
+from mir_interface.mir_interface import MIRBase
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(fake_mir, **kwargs):
+    base = MIRBase("robot", "key", "A", transport=fake_mir)
+    return ChargingScheduler(base, "two", **kwargs)
+
+
+def charge_docks(fake_mir):
+    return [
+        entry["id"]
+        for entry in fake_mir.queue[1:]
+        if fake_mir.queued_actions(entry["id"])[0][0] == "docking"
+    ]
+
+
+def test_tick_charges_after_idle_grace_below_threshold(fake_mir):
+    fake_mir.battery = 50.0
+    clock = Clock()
+    scheduler = make_scheduler(fake_mir, idle_grace=60.0, clock=clock)
+
+    scheduler.tick()
+    clock.now += 30
+    scheduler.tick()
+    assert not scheduler.charging
+
+    clock.now += 31
+    scheduler.tick()
+    assert scheduler.charging
+    assert charge_docks(fake_mir) == [scheduler.charge_queue_id]
+
+
+def test_tick_does_not_charge_above_threshold(fake_mir):
+    fake_mir.battery = 70.0
+    clock = Clock()
+    scheduler = make_scheduler(fake_mir, charge_below=60.0, clock=clock)
+
+    scheduler.tick()
+    clock.now += 3600
+    scheduler.tick()
+
+    assert not scheduler.charging
+    assert charge_docks(fake_mir) == []
+
+
+def test_tick_charges_at_once_at_critical_level(fake_mir):
+    fake_mir.battery = 15.0
+    scheduler = make_scheduler(fake_mir, critical_level=20.0, clock=Clock())
+
+    scheduler.tick()
+
+    assert scheduler.charging
+
+
+def test_short_predicted_idle_windows_prevent_charging(fake_mir):
+    fake_mir.battery = 50.0
+    clock = Clock()
+    scheduler = make_scheduler(
+        fake_mir, idle_grace=60.0, min_idle_window=600.0, clock=clock
+    )
+    scheduler.idle_periods.extend([100.0, 120.0, 90.0])
+
+    scheduler.tick()
+    clock.now += 61
+    scheduler.tick()
+    assert scheduler.predicted_idle() == 100.0
+    assert not scheduler.charging
+
+    scheduler.idle_periods.extend([1000.0] * 4)
+    scheduler.tick()
+    assert scheduler.charging
+
+
+def test_busy_node_suppresses_charging(fake_mir):
+    fake_mir.battery = 10.0
+    scheduler = make_scheduler(fake_mir, is_busy=lambda: True, clock=Clock())
+
+    scheduler.tick()
+
+    assert not scheduler.charging
+    assert scheduler.idle_since is None
+
+
+def test_idle_periods_are_measured_on_the_clock(fake_mir):
+    clock = Clock()
+    busy = [False]
+    scheduler = make_scheduler(fake_mir, is_busy=lambda: busy[0], clock=clock)
+
+    scheduler.tick()
+    clock.now += 250
+    busy[0] = True
+    scheduler.tick()
+
+    assert list(scheduler.idle_periods) == [250.0]
+
+
+def test_charging_stops_at_charged_level(fake_mir):
+    fake_mir.battery = 15.0
+    scheduler = make_scheduler(fake_mir, charged_level=95.0, clock=Clock())
+    scheduler.tick()
+    assert scheduler.charging
+
+    fake_mir.battery = 90.0
+    scheduler.tick()
+    assert scheduler.charging
+
+    fake_mir.battery = 96.0
+    scheduler.tick()
+    assert not scheduler.charging
+    assert scheduler.charge_queue_id is None
+
+
+def test_aborted_charge_is_cleared(fake_mir):
+    scheduler = make_scheduler(fake_mir)
+    scheduler.start_charging()
+    fake_mir.finish(fake_mir.entry(scheduler.charge_queue_id), "Aborted")
+
+    scheduler.tick()
+
+    assert not scheduler.charging
+    assert scheduler.charge_queue_id is None
+
+
+def test_prepare_for_mission_stops_waiting_when_the_charge_fails(fake_mir):
+    fake_mir.battery = 10.0
+    scheduler = make_scheduler(fake_mir)
+    scheduler.start_charging()
+    fake_mir.finish(fake_mir.entry(scheduler.charge_queue_id), "Aborted")
+
+    scheduler.prepare_for_mission()
+
+    assert not scheduler.charging
+
+
+def test_prepare_for_mission_wait_is_bounded(fake_mir):
+    fake_mir.battery = 10.0
+    scheduler = make_scheduler(fake_mir, poll_interval=10.0, max_charge_wait=60.0)
+    scheduler.start_charging()
+
+    with pytest.raises(ValueError, match="did not reach"):
+        scheduler.prepare_for_mission()
+    assert fake_mir.slept == 60.0
+
+
+def test_prepare_for_mission_interrupts_charging_at_safe_level(fake_mir):
+    scheduler = make_scheduler(fake_mir)
+    scheduler.start_charging()
+    charge_id = scheduler.charge_queue_id
+
+    scheduler.prepare_for_mission()
+
+    assert not scheduler.charging
+    assert fake_mir.entry(charge_id)["state"] == "Aborted"
+
+
+def test_charging_missions_are_kept_apart_from_docking(fake_mir, tmp_path):
+    history = MissionHistory(tmp_path / "history.db", flush_interval=0.01)
+    base = MIRBase("robot", "key", "A", transport=fake_mir, history=history)
+    ChargingScheduler(base, "two").start_charging()
+    base.abort_mission_queue()
+
+    base.track_mission_progress()
+    history.flush()
+
+    assert set(history.failure_rates()) == {"charging"}
+    history.close()
@@ -0,0 +1,64 @@
+import threading
+
+from mir_interface.mir_interface import MIRBase
+
+
+def test_shared_base_under_concurrent_use(fake_mir):
+    base = MIRBase(
+        "robot",
+        "key",
+        "A",
+        transport=fake_mir,
+        entry_positions={"A": "one", "B": "three"},
+    )
+    stop = threading.Event()
+    errors = []
+    snapshots = []
+
+    def hammer(call):
+        try:
+            while not stop.is_set():
+                call()
+        except Exception as error:
+            errors.append(error)
+
+    def read_locations():
+        locations = base.locations_dict
+        snapshots.append(
+            {name: set(positions) for name, positions in locations.items()}
+        )
+
+    readers = [
+        threading.Thread(target=hammer, args=(call,))
+        for call in (
+            base.get_state,
+            base.get_mission_queue,
+            read_locations,
+            base.refresh_all_positions,
+        )
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        for _ in range(5):
+            base.move("B:three")
+            base.move("A:two")
+        assert base.wait_until_finished() == "Done"
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+    assert errors == []
+    assert snapshots
+    expected = {"A": {"one", "two"}, "B": {"three"}}
+    for snapshot in snapshots:
+        assert all(snapshot[name] == expected[name] for name in snapshot)
+    assert base.map_name == "A"
+    assert base.map_guid == base.current_map["guid"] == "map-A"
+    queued = [entry["id"] for entry in fake_mir.queue[1:]]
+    assert queued == sorted(set(queued))
+    switches = [
+        fake_mir.queued_actions(queue_id)[0][1]["map"] for queue_id in queued[:10]
+    ]
+    assert switches == ["map-B", "map-A"] * 5
@@ -0,0 +1,86 @@
+import time
+from zoneinfo import ZoneInfo
+
+from mir_interface.history import MissionHistory
+from mir_interface.mir_interface import MIRBase
+
+
+def make_base(fake_mir, tmp_path, **kwargs):
+    history = MissionHistory(tmp_path / "history.db", flush_interval=0.01)
+    return MIRBase("robot", "key", "A", transport=fake_mir, history=history, **kwargs)
+
+
+def test_missions_are_tracked_from_queue_timestamps(fake_mir, tmp_path):
+    fake_mir.timezone = ZoneInfo("Asia/Tokyo")
+    base = make_base(fake_mir, tmp_path, robot_timezone="Asia/Tokyo")
+    move = base.move("one")
+    mission = base.post_mission_to_queue("custom", [])
+
+    base.get_mission_queue()  # move starts
+    base.track_mission_progress()  # move finishes in the fake
+    base.get_mission_queue()  # custom starts
+    base.track_mission_progress()  # custom finishes
+    base.history.flush()
+
+    rows = base.history._query(
+        "SELECT queue_id, action_type, location, submitted, started, finished, state "
+        "FROM missions ORDER BY queue_id",
+        (),
+    )
+    assert [row[:3] for row in rows] == [
+        (move["id"], "move", "one"),
+        (mission["id"], "mission", None),
+    ]
+    for queue_id, *_, submitted, started, finished, state in rows:
+        entry = fake_mir.entry(queue_id)
+        assert state == "Done"
+        assert started == base.robot_time(entry["started"])
+        assert finished == base.robot_time(entry["finished"])
+        # Robot times land on the host clock, whatever the host's time zone.
+        assert abs(started - submitted) < 5
+        assert abs(finished - time.time()) < 5
+    assert base.tracked_missions == {}
+    base.history.close()
+
+
+def test_wait_reports_aborted_missions(fake_mir, tmp_path):
+    base = make_base(fake_mir, tmp_path)
+    base.dock("two")
+    base.abort_mission_queue()
+
+    assert base.wait_until_finished() == "Aborted"
+    base.track_mission_progress()
+    base.history.flush()
+    assert base.history.failure_rates()["docking"]["failed"] == 1
+    base.history.close()
+
+
+def test_stale_tracked_missions_expire(fake_mir, tmp_path):
+    base = make_base(fake_mir, tmp_path)
+    stuck = base.wait(1)
+    gone = base.wait(1)
+    fake_mir.queue.remove(fake_mir.entry(gone["id"]))
+    base.tracked_missions = {
+        **base.tracked_missions,
+        stuck["id"]: {
+            "submitted": time.time() - 2 * base.tracking_timeout,
+            "started": False,
+        },
+    }
+
+    base.track_mission_progress()
+
+    assert base.tracked_missions == {}
+    base.history.close()
+
+
+def test_missions_per_hour_window_starts_at_first_submission(tmp_path):
+    history = MissionHistory(tmp_path / "history.db", flush_interval=0.01)
+    now = time.time()
+    history.record_submitted(1, "first", "move", submitted=now - 3600)
+    history.record_submitted(2, "second", "move", submitted=now - 20)
+    history.record_finished(2, "Done", now - 10)
+    history.flush()
+
+    assert round(history.missions_per_hour(until=now)) == 1
+    history.close()
@@ -0,0 +1,53 @@
+import pytest
+
+from mir_interface.mir_interface import MIRBase
+
+
+def test_cross_map_move_switches_map_inside_the_mission(fake_mir):
+    base = MIRBase(
+        "robot",
+        "key",
+        "A",
+        transport=fake_mir,
+        entry_positions={"A": "one", "B": "three"},
+    )
+    base.wait(1)
+
+    queue_entry = base.move("B:three")
+
+    actions = fake_mir.queued_actions(queue_entry["id"])
+    assert [action_type for action_type, _ in actions] == ["switch_map", "move"]
+    assert actions[0][1]["map"] == "map-B"
+    assert actions[0][1]["position"] == "B-three"
+    assert actions[1][1]["position"] == "B-three"
+    assert ("PUT", "status") not in fake_mir.requests
+    assert base.map_name == "B"
+    # The robot is still on map A until the queued missions ran.
+    assert fake_mir.active_map == "map-A"
+    assert not base.refresh_positions()["active_map_switched"]
+
+    # Unqualified names now refer to map B.
+    with pytest.raises(KeyError):
+        base.move("two")
+    assert fake_mir.queued_actions(base.move("A:two")["id"])[0][0] == "switch_map"
+    assert base.switch_map("A") is None
+
+
+def test_map_switch_needs_an_entry_position(fake_mir):
+    base = MIRBase("robot", "key", "A", transport=fake_mir)
+
+    with pytest.raises(ValueError, match="entry position"):
+        base.move("B:three")
+    assert base.map_name == "A"
+
+
+def test_refresh_all_positions_covers_every_loaded_map(fake_mir):
+    base = MIRBase("robot", "key", "A", transport=fake_mir)
+    base.load_maps()
+    fake_mir.positions["B-three"]["pos_y"] = 7.0
+
+    results = base.refresh_all_positions()
+
+    assert set(results) == {"A", "B"}
+    assert results["B"]["changed"] == ["three"]
+    assert base.locations_dict["B"]["three"]["pos_y"] == 7.0
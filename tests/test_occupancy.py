@@ -0,0 +1,247 @@
+import base64
+import math
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from mir_interface.mir_interface import MIRBase
+from mir_interface.occupancy import OccupancyCache, OccupancyGrid, decode_png
+
+RESOLUTION = 0.1
+SIZE = 40  # cells, so maps are 4 m x 4 m
+
+
+def _paeth(left, up, upper_left):
+    estimate = left + up - upper_left
+    distances = (abs(estimate - left), abs(estimate - up), abs(estimate - upper_left))
+    return (left, up, upper_left)[distances.index(min(distances))]
+
+
+def _filter_row(kind, row, previous, bpp):
+    """Apply a PNG filter type to one scanline."""
+    out = []
+    for i, value in enumerate(row):
+        left = row[i - bpp] if i >= bpp else 0
+        up = previous[i]
+        upper_left = previous[i - bpp] if i >= bpp else 0
+        predictor = (0, left, up, (left + up) // 2, _paeth(left, up, upper_left))[kind]
+        out.append((value - predictor) % 256)
+    return bytes([kind, *out])
+
+
+def png(pixels, color_type=0, filters=(0,), palette=None, transparency=None):
+    """Encode an 8-bit image of shape (height, width[, channels]) as a PNG."""
+
+    def chunk(kind, body):
+        crc = struct.pack(">I", zlib.crc32(kind + body))
+        return struct.pack(">I", len(body)) + kind + body + crc
+
+    pixels = np.asarray(pixels, dtype=np.uint8)
+    height, width = pixels.shape[:2]
+    rows = pixels.reshape(height, -1).tolist()
+    bpp = len(rows[0]) // width
+    previous = [0] * len(rows[0])
+    data = b""
+    for index, row in enumerate(rows):
+        data += _filter_row(filters[index % len(filters)], row, previous, bpp)
+        previous = row
+
+    header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+    chunks = chunk(b"IHDR", header)
+    if palette is not None:
+        chunks += chunk(b"PLTE", np.asarray(palette, dtype=np.uint8).tobytes())
+    if transparency is not None:
+        chunks += chunk(b"tRNS", bytes(transparency))
+    chunks += chunk(b"IDAT", zlib.compress(data)) + chunk(b"IEND", b"")
+    return b"\x89PNG\r\n\x1a\n" + chunks
+
+
+def free_map():
+    return np.full((SIZE, SIZE), 255)
+
+
+def block(gray, x0, y0, x1, y1):
+    """Mark the rectangle between two map coordinates in meters as an obstacle."""
+    rows = slice(SIZE - round(y1 / RESOLUTION), SIZE - round(y0 / RESOLUTION))
+    gray[rows, round(x0 / RESOLUTION) : round(x1 / RESOLUTION)] = 0
+    return gray
+
+
+def set_map_image(fake_mir, map_guid, gray, resolution=RESOLUTION):
+    fake_mir.map_images[map_guid] = {
+        "map": base64.b64encode(png(gray)).decode(),
+        "origin_x": 0.0,
+        "origin_y": 0.0,
+        "resolution": resolution,
+    }
+
+
+def make_base(fake_mir, tmp_path):
+    return MIRBase(
+        "robot",
+        "key",
+        "A",
+        transport=fake_mir,
+        occupancy=OccupancyCache(tmp_path),
+        entry_positions={"A": "one", "B": "three"},
+    )
+
+
+def queued_missions(fake_mir):
+    return fake_mir.requests.count(("POST", "mission_queue"))
+
+
+def test_cached_grid_is_reused_until_the_map_image_changes(
+    fake_mir, tmp_path, monkeypatch
+):
+    free = np.full((4, 4), 255)
+    set_map_image(fake_mir, "map-A", free, resolution=1.0)
+    base = MIRBase("robot", "key", "A", transport=fake_mir)
+    assert not OccupancyCache(tmp_path).get(base, "map-A").occupied.any()
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "map-A.json",
+        "map-A.npy",
+    ]
+
+    cache = OccupancyCache(tmp_path)
+    with monkeypatch.context() as patch:
+        patch.setattr(OccupancyGrid, "from_map", pytest.fail)
+        cache.get(base, "map-A")
+
+    walled = free.copy()
+    walled[:, 2] = 0
+    set_map_image(fake_mir, "map-A", walled, resolution=1.0)
+    assert not cache.get(base, "map-A").occupied.any()
+    cache.invalidate("map-A")
+    assert cache.get(base, "map-A").occupied[:, 2].all()
+
+    cache.clear()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_move_rejects_a_blocked_target_before_queueing(fake_mir, tmp_path):
+    set_map_image(fake_mir, "map-A", block(free_map(), 1.8, 1.8, 2.2, 2.2))
+    base = make_base(fake_mir, tmp_path)
+
+    with pytest.raises(ValueError, match="not in free space"):
+        base.move("two")
+    assert queued_missions(fake_mir) == 0
+
+
+def test_move_rejects_an_unreachable_target_before_queueing(fake_mir, tmp_path):
+    gray = free_map()
+    for wall in ((1.4, 1.4, 2.6, 1.6), (1.4, 2.4, 2.6, 2.6)):
+        block(gray, *wall)
+    for wall in ((1.4, 1.4, 1.6, 2.6), (2.4, 1.4, 2.6, 2.6)):
+        block(gray, *wall)
+    set_map_image(fake_mir, "map-A", gray)
+    base = make_base(fake_mir, tmp_path)
+
+    with pytest.raises(ValueError, match="not reachable"):
+        base.move("two")
+    assert queued_missions(fake_mir) == 0
+
+    base.move("one")
+    assert queued_missions(fake_mir) == 1
+
+
+def test_paths_are_planned_from_the_last_queued_target(fake_mir, tmp_path):
+    set_map_image(fake_mir, "map-A", free_map())
+    # On map B, the robot's map A coordinates (0.5, 0.5) are walled in.
+    gray = block(free_map(), 0.0, 1.0, 1.2, 1.2)
+    set_map_image(fake_mir, "map-B", block(gray, 1.0, 0.0, 1.2, 1.2))
+    base = make_base(fake_mir, tmp_path)
+
+    base.move("B:three")
+    assert base.map_name == "B"
+    # Planned from B:three, not from the robot's position on map A.
+    assert base.check_reachable("three") == 0
+    base.move("three")
+    assert queued_missions(fake_mir) == 2
+    assert base.planning_start("A") is None
+
+
+def test_paths_are_not_planned_off_the_active_map(fake_mir, tmp_path):
+    base = make_base(fake_mir, tmp_path)
+    fake_mir.active_map = "map-B"
+
+    assert base.planning_start("A") is None
+    fake_mir.active_map = "map-A"
+    assert base.planning_start("A") == fake_mir.robot_position
+
+
+def test_switching_maps_keeps_cached_grids(fake_mir, tmp_path):
+    set_map_image(fake_mir, "map-A", free_map())
+    set_map_image(fake_mir, "map-B", free_map())
+    base = make_base(fake_mir, tmp_path)
+
+    for location in ("one", "B:three", "A:two", "B:three", "A:one"):
+        base.move(location)
+
+    assert fake_mir.requests.count(("GET", "maps/map-A")) == 1
+    assert fake_mir.requests.count(("GET", "maps/map-B")) == 1
+
+
+def test_is_free_with_clearance():
+    occupied = np.zeros((SIZE, SIZE), dtype=bool)
+    occupied[SIZE - 21, 20] = True  # the cell at x 2.0-2.1, y 2.0-2.1
+    grid = OccupancyGrid(occupied, 0.0, 0.0, RESOLUTION)
+
+    x = np.array([2.05, 2.25, 2.55, -1.0])
+    y = np.array([2.05, 2.05, 2.05, 2.05])
+    assert grid.is_free(x, y).tolist() == [False, True, True, False]
+    assert grid.is_free(x, y, clearance=0.2).tolist() == [False, False, True, False]
+    assert grid.is_free(x, y, clearance=0.5).tolist() == [False, False, False, False]
+
+
+def test_path_length():
+    grid = OccupancyGrid(np.zeros((SIZE, SIZE), dtype=bool), 0.0, 0.0, RESOLUTION)
+    assert grid.path_length((0.5, 0.5), (3.5, 0.5)) == pytest.approx(3.0)
+    assert grid.path_length((0.5, 0.5), (3.5, 3.5)) == pytest.approx(
+        3 * math.sqrt(2), rel=0.1
+    )
+    assert grid.path_length((0.5, 0.5), (9.0, 0.5)) is None
+
+    walled = OccupancyGrid(
+        block(free_map(), 2.0, 0.0, 2.2, 3.0) < 128, 0.0, 0.0, RESOLUTION
+    )
+    # Around the end of the wall at y = 3 m: about 2.97 m up and 2.87 m back down.
+    detour = walled.path_length((0.5, 0.5), (3.5, 0.5))
+    assert detour == pytest.approx(5.84, rel=0.1)
+    closed = OccupancyGrid(
+        block(free_map(), 2.0, 0.0, 2.2, 4.0) < 128, 0.0, 0.0, RESOLUTION
+    )
+    assert closed.path_length((0.5, 0.5), (3.5, 0.5)) is None
+
+
+@pytest.mark.parametrize("filters", [(0,), (1,), (2,), (3,), (4,), (0, 1, 2, 3, 4)])
+def test_decode_png_filters(filters):
+    rng = np.random.default_rng(0)
+    gray = rng.integers(0, 256, size=(7, 9))
+    rgba = rng.integers(0, 256, size=(7, 9, 4))
+
+    assert (decode_png(png(gray, 0, filters))[..., 0] == gray).all()
+    assert (decode_png(png(rgba, 6, filters)) == rgba).all()
+
+
+def test_decode_png_palette_with_transparency():
+    palette = [[0, 0, 0], [255, 255, 255], [10, 20, 30]]
+    indices = np.array([[0, 1, 2], [2, 1, 0]])
+
+    image = decode_png(png(indices, 3, (1, 4), palette=palette, transparency=[0, 255]))
+
+    expected = np.array([[0, 0, 0, 0], [255, 255, 255, 255], [10, 20, 30, 255]])
+    assert (image == expected[indices]).all()
+
+
+def test_grid_from_rgba_map_ignores_transparent_pixels():
+    rgba = np.zeros((2, 2, 4), dtype=np.uint8)
+    rgba[..., 3] = [[255, 0], [255, 255]]
+    rgba[1, 1, :3] = 255
+    map_data = {"map": base64.b64encode(png(rgba, 6)).decode(), "resolution": 1.0}
+
+    grid = OccupancyGrid.from_map(map_data)
+
+    assert grid.occupied.tolist() == [[True, False], [True, False]]
@@ -0,0 +1,32 @@
+from mir_interface.mir_interface import MIRBase
+
+
+def test_refresh_detects_moved_added_and_removed_positions(fake_mir):
+    base = MIRBase("robot", "key", "A", transport=fake_mir)
+    assert set(base.locations_dict["A"]) == {"one", "two"}
+
+    fake_mir.positions["A-one"]["pos_x"] = 9.0
+    del fake_mir.positions["A-two"]
+    fake_mir.add_position("A", "four", 4.0, 4.0)
+    fake_mir.requests.clear()
+    result = base.refresh_positions()
+
+    assert result["changed"] == ["one"]
+    assert result["removed"] == ["two"]
+    assert result["added"] == ["four"]
+    assert base.locations_dict["A"]["one"]["pos_x"] == 9.0
+    assert fake_mir.requests.count(("POST", "positions/search")) == 1
+    assert not any(path.startswith("positions/A-") for _, path in fake_mir.requests)
+
+
+def test_refresh_follows_the_active_map_of_the_robot(fake_mir):
+    base = MIRBase("robot", "key", "A", transport=fake_mir)
+    fake_mir.active_map = "map-B"
+
+    result = base.refresh_positions()
+
+    assert result["active_map_switched"]
+    assert base.map_name == "B"
+    assert base.map_guid == "map-B"
+    assert set(base.locations_dict["B"]) == {"three"}
+    assert not base.refresh_positions()["active_map_switched"]
@@ -0,0 +1,73 @@
+from mir_interface import transport
+from mir_interface.mir_interface import MIRBase
+from mir_interface.transport import (
+    RecordingTransport,
+    ReplayTransport,
+    cassette_summary,
+    load_cassette,
+)
+
+
+def run_session(transport):
+    base = MIRBase("robot", "SECRET-KEY", "A", transport=transport)
+    base.move("one")
+    base.wait_until_finished()
+    base.get_state()
+
+
+def call_counts(summary):
+    return {call: stats["count"] for call, stats in summary["calls"].items()}
+
+
+def test_replay_matches_recorded_call_counts(tmp_path, fake_mir, monkeypatch):
+    cassette = tmp_path / "session.jsonl"
+    run_session(RecordingTransport(cassette, transport=fake_mir))
+
+    replay = ReplayTransport(cassette, latency_scale=0)
+    sleeps = []
+    monkeypatch.setattr(transport.time, "sleep", sleeps.append)
+    run_session(replay)
+    monkeypatch.undo()
+
+    recorded = cassette_summary(load_cassette(cassette))
+    assert call_counts(replay.summary()) == call_counts(recorded)
+    assert replay.summary()["total_calls"] == recorded["total_calls"]
+    assert recorded["duration"] >= 0
+    # The default 5 s poll interval is scaled away along with the latency.
+    assert fake_mir.slept > 0
+    assert replay.summary()["total_seconds"] == 0
+    assert sleeps == []
+
+
+def test_sessions_are_replayed_separately(tmp_path, fake_mir):
+    cassette = tmp_path / "session.jsonl"
+    first = RecordingTransport(cassette, transport=fake_mir)
+    first.request("GET", "http://robot/api/v2.0.0/maps")
+    second = RecordingTransport(cassette, transport=fake_mir)
+    second.request("GET", "http://robot/api/v2.0.0/mission_groups")
+    second.request("GET", "http://robot/api/v2.0.0/maps")
+
+    assert [e["path"] for e in load_cassette(cassette, 0)] == ["/api/v2.0.0/maps"]
+    assert len(load_cassette(cassette)) == 2
+    assert len(load_cassette(cassette, None)) == 3
+    assert ReplayTransport(cassette, session=0).summary()["total_calls"] == 0
+
+
+def test_secrets_are_redacted(tmp_path, fake_mir):
+    cassette = tmp_path / "session.jsonl"
+    recorder = RecordingTransport(cassette, transport=fake_mir, redact=["SECRET-KEY"])
+    recorder.request(
+        "GET",
+        "http://robot/api/v2.0.0/maps?token=SECRET-KEY",
+        headers={"Authorization": "SECRET-KEY"},
+    )
+    recorder.request(
+        "POST",
+        "http://robot/api/v2.0.0/missions/search",
+        json={
+            "filters": [{"fieldname": "name", "operator": "=", "value": "SECRET-KEY"}]
+        },
+    )
+
+    assert "SECRET-KEY" not in cassette.read_text()
+    assert load_cassette(cassette)[0]["path"] == "/api/v2.0.0/maps?token=<redacted>"